@@ -11,7 +11,7 @@ import errno # Import errno for checking permission error
 
 from . import config
 from . import integration
-from .utils import sanitize_name
+from .utils import sanitize_name, find_first_matching, DESKTOP_RE, DESKTOP_PRUNE_DIRS
 from .db_manager import DBManager # Add import for DB access
 
 logger = logging.getLogger(__name__)
@@ -60,9 +60,11 @@ def find_leftover_installs():
     for scan_dir in scan_dirs:
         logger.debug(f"Scanning directory for subdirectories: {scan_dir}")
         try:
-            for item_name in os.listdir(scan_dir):
-                item_path = os.path.join(scan_dir, item_name)
-                if os.path.isdir(item_path):
+            with os.scandir(scan_dir) as it:
+                entries = list(it)
+            for entry in entries:
+                item_name, item_path = entry.name, entry.path
+                if entry.is_dir(): # d_type, no stat for plain directories
                     if item_path not in known_install_paths:
                         logger.info(f"Found potential leftover directory (not in DB): {item_path}")
                         
@@ -102,21 +104,16 @@ def remove_leftover_install(path):
     icon_name = None
     original_desktop_name = None
     
-    potential_desktop_file = None
-    for root, _, files in os.walk(path):
-        for file in files:
-            if file.lower().endswith('.desktop'):
-                potential_desktop_file = os.path.join(root, file)
-                logger.debug(f"Found potential desktop file in leftover dir: {potential_desktop_file}")
-                break
-        if potential_desktop_file:
-            break
+    potential_desktop_file = find_first_matching(path, DESKTOP_RE, prune=DESKTOP_PRUNE_DIRS)
+    if potential_desktop_file:
+        logger.debug(f"Found potential desktop file in leftover dir: {potential_desktop_file}")
                          
     if potential_desktop_file:
         try:
             parser = configparser.ConfigParser(interpolation=None)
             parser.optionxform = str 
-            parser.read(potential_desktop_file, encoding='utf-8')
+            # One read, one decode; undecodable bytes don't make the whole file unreadable
+            parser.read_string(Path(potential_desktop_file).read_bytes().decode('utf-8', 'replace'))
             if 'Desktop Entry' in parser:
                 entry = parser['Desktop Entry']
                 guessed_name = entry.get("Name")
@@ -342,11 +339,10 @@ def find_orphaned_integrations():
         if os.path.isdir(app_dir):
             try:
                 logger.debug(f"Scanning for .desktop files in: {app_dir}")
-                for filename in os.listdir(app_dir):
-                    if filename.lower().endswith(".desktop"):
-                        full_path = os.path.join(app_dir, filename)
-                        if os.path.isfile(full_path): 
-                            found_desktop_files.append(full_path)
+                with os.scandir(app_dir) as entries:
+                    for entry in entries:
+                        if entry.name.lower().endswith(".desktop") and entry.is_file():
+                            found_desktop_files.append(entry.path)
             except OSError as e:
                 logger.warning(f"Could not scan directory '{app_dir}': {e}")
 
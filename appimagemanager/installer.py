@@ -5,83 +5,772 @@ import shutil
 import logging
 import tempfile
 import subprocess
-import configparser
 import uuid
+import errno
+import itertools
 import re
+import struct
+import shlex
+import stat
+import functools
+import atexit
+import threading
+import fcntl
+from concurrent.futures import ThreadPoolExecutor
 import datetime
+from collections import deque
 
 from . import config
 from . import integration
-from .utils import sanitize_name
+from .utils import sanitize_name, list_dir, find_first_matching, DESKTOP_RE, DESKTOP_PRUNE_DIRS
+
+try:
+    # Optional: lets us read metadata straight from the embedded squashfs
+    from PySquashfsImage import SquashFsImage
+except ImportError:
+    SquashFsImage = None
+
+try:
+    # Optional: pumped while waiting on subprocesses so the UI stays responsive
+    from PyQt6.QtWidgets import QApplication
+except ImportError:
+    QApplication = None
 
 logger = logging.getLogger(__name__)
 
-def _run_subprocess_non_blocking(cmd, cwd=None, timeout=60, env=None, check_interval=0.1):
+FICLONE = 0x40049409 # ioctl request for a copy-on-write clone (btrfs, XFS)
+REFLINK_UNSUPPORTED_ERRNOS = frozenset({errno.EOPNOTSUPP, errno.EXDEV, errno.EINVAL, errno.ENOTTY}) # FICLONE errors meaning "never for this pair"
+SENDFILE_CHUNK = 1 << 20 # Bytes per sendfile(2) call when copy_file_range isn't usable
+SQUASHFS_MAGIC = b'hsqs'
+APPIMAGE_MAGIC = b'AI' # At offset 8 of the ELF header, followed by the type byte
+
+PARALLEL_RSYNC_MIN_ENTRIES = 500 # Root installs of larger trees copy with parallel rsync shards
+RMTREE_SUBPROCESS_THRESHOLD = 1000 # Trees with more entries are removed with rm -rf
+PARALLEL_HEADER_MIN_FILES = 16 # app/ scans with more candidates read their headers concurrently
+HEADER_READ_WORKERS = 8
+TMPFS_DIR = "/dev/shm" # RAM-backed, preferred for extraction when large enough
+TMPFS_SIZE_FACTOR = 3 # Required free tmpfs space as a multiple of the AppImage size
+TMPFS_PREFIX = "aim_" # Temp dirs in TMPFS_DIR are named <prefix><pid>_<random>
+
+# Filename patterns used while scanning extracted AppImages
+ICON_EXTS = ('png', 'svg', 'svgz', 'xpm', 'ico') # In order of preference
+APPIMAGE_SUFFIX_RE = re.compile(r"\.appimage\Z", re.I)
+VERSION_CLEAN_RE = re.compile(r"[^a-zA-Z0-9_\-.]") # Characters replaced in the install dir version part
+SHEBANG_INTEGRATION_RE = re.compile(rb"desktop|appimage", re.I) # Marks AppRun desktop integration scripts
+ICON_RE = re.compile(r"(.+)\.(" + "|".join(ICON_EXTS) + r")$", re.I)
+ICON_SEARCH_DIRS = ( # Where the preview icon is looked for, in order of preference
+    "",  # Root of squashfs
+    # Standard XDG hicolor icon directories (256, 128, 64, 48, 32, scalable)
+    "usr/share/icons/hicolor/256x256/apps",
+    "usr/share/icons/hicolor/128x128/apps", 
+    "usr/share/icons/hicolor/64x64/apps",
+    "usr/share/icons/hicolor/48x48/apps",
+    "usr/share/icons/hicolor/32x32/apps",
+    "usr/share/icons/hicolor/scalable/apps",
+    "share/icons/hicolor/256x256/apps",
+    "share/icons/hicolor/128x128/apps",
+    "share/icons/hicolor/64x64/apps",
+    "share/icons/hicolor/48x48/apps",
+    "share/icons/hicolor/32x32/apps",
+    "share/icons/hicolor/scalable/apps",
+    # Pixmaps directories
+    "usr/share/pixmaps",
+    "share/pixmaps",
+    # Some apps use these non-standard locations
+    "usr/share/icons",
+    "share/icons",
+    "resources",
+    "assets",
+    "icons",
+)
+STDERR_TAIL_LINES = 200 # stderr lines kept by _run_subprocess_non_blocking
+DESKTOP_CACHE_SIZE = 128 # Parsed .desktop files kept in memory
+DESKTOP_DATA_KEYS = ("name", "version", "icon_name", "exec", "exec_relative") # Always present in parsed .desktop data
+DESKTOP_KEYS = frozenset({b"Name", b"Version", b"X-AppImage-Version", b"Icon", b"Exec"}) # [Desktop Entry] keys we read
+DESKTOP_ENTRY_HEADER_RE = re.compile(rb"^[ \t]*\[Desktop Entry\][ \t]*\r?$", re.M)
+DESKTOP_SECTION_RE = re.compile(rb"^[ \t]*\[", re.M) # Start of any section header
+# Globs extracted one at a time when reading metadata; the .desktop pattern must stay
+# first since the icon patterns are skipped when it fails. The icon patterns are tried
+# in order until one of them yields an icon
+METADATA_EXTRACT_PATTERNS = (
+    "*.desktop",
+    ".DirIcon",
+    "usr/share/pixmaps/*",
+    "share/pixmaps/*",
+)
+
+_rmtree_threads = [] # Background deletions started by _async_rmtree
+_rmtree_threads_lock = threading.Lock() # Installers may be driven from more than one thread
+_temp_name_counter = itertools.count() # See _unique_suffix
+
+def _unique_suffix():
+    """Returns a name suffix unique among all processes on this machine, for temp files and dirs.
+    
+    pid plus a per-process counter: no random bytes needed when the name only
+    has to be unique, not unguessable (ids that leave the process keep using uuid4).
+    """
+    return f"{os.getpid()}_{next(_temp_name_counter)}"
+
+def _has_more_entries(path, limit):
+    """Returns True if the tree under path holds more than limit entries, stopping as soon as it does."""
+    count = 0
+    stack = [path]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    count += 1
+                    if count > limit:
+                        return True
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+        except OSError:
+            continue
+    return False
+
+def _list_tree(path, limit):
+    """Lists the tree under path for removal, giving up once it holds more than limit entries.
+    
+    Returns:
+        tuple or None: (non-directory paths, directory paths parents-first), or
+                       None if the tree is larger than limit
+    """
+    files, dirs = [], []
+    stack = [path]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    # d_type answers is_dir without a stat; symlinks to dirs are unlinked, not followed
+                    if entry.is_dir(follow_symlinks=False):
+                        dirs.append(entry.path)
+                        stack.append(entry.path)
+                    else:
+                        files.append(entry.path)
+                    if len(files) + len(dirs) > limit:
+                        return None
+        except OSError:
+            continue
+    return files, dirs
+
+def _rmtree(path):
+    """Removes a directory tree, ignoring errors.
+    
+    Small trees are removed straight from the scandir listing that measured
+    them, so nothing is scanned twice. Large trees (full extractions) are
+    handed to rm -rf, which removes them with unlinkat() relative to cached
+    directory fds and is noticeably faster than shutil.rmtree.
+    """
+    tree = _list_tree(path, RMTREE_SUBPROCESS_THRESHOLD)
+    if tree is not None:
+        files, dirs = tree
+        try:
+            for file_path in files:
+                os.unlink(file_path)
+            for dir_path in reversed(dirs):
+                os.rmdir(dir_path)
+            os.rmdir(path)
+            return
+        except FileNotFoundError:
+            if not os.path.lexists(path):
+                return
+        except OSError as e:
+            logger.debug("Direct removal of %s failed (%s), using shutil.rmtree.", path, e)
+    else:
+        rm = shutil.which("rm")
+        if rm:
+            result = subprocess.run([rm, "-rf", "--one-file-system", "--", path], stdin=subprocess.DEVNULL,
+                                    stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+            if result.returncode == 0:
+                return
+    shutil.rmtree(path, ignore_errors=True)
+
+def _async_rmtree(path):
+    """Removes a directory tree without blocking the caller.
+    
+    The tree is renamed aside (O(1)) and deleted in a daemon thread, so the
+    original path can be recreated immediately.
+    """
+    trash_path = f"{path}.trash.{_unique_suffix()}"
+    try:
+        os.rename(path, trash_path)
+    except OSError as e:
+        logger.debug("Could not move %s aside (%s), removing it synchronously.", path, e)
+        _rmtree(path)
+        return
+    thread = threading.Thread(target=_rmtree, args=(trash_path,), daemon=True)
+    thread.start()
+    with _rmtree_threads_lock:
+        _rmtree_threads[:] = [t for t in _rmtree_threads if t.is_alive()]
+        _rmtree_threads.append(thread)
+
+def _join_rmtree_threads():
+    """Waits for pending background deletions started by _async_rmtree."""
+    with _rmtree_threads_lock:
+        threads = list(_rmtree_threads)
+        _rmtree_threads.clear()
+    for thread in threads:
+        thread.join()
+
+atexit.register(_join_rmtree_threads)
+
+_reflink_support = {} # (src st_dev, dst st_dev) -> whether FICLONE works between them
+
+def _sendfile_copy(src_fd, dst_fd, size):
+    """Copies size bytes from the start of src_fd to dst_fd with sendfile(2), replacing its contents."""
+    os.ftruncate(dst_fd, 0)
+    os.lseek(dst_fd, 0, os.SEEK_SET)
+    offset = 0
+    while offset < size:
+        sent = os.sendfile(dst_fd, src_fd, offset, min(size - offset, SENDFILE_CHUNK))
+        if sent == 0:
+            break
+        offset += sent
+    return offset == size
+
+def _fast_copy(src, dst):
+    """Copies a file inside the kernel where possible.
+    
+    Tries a reflink (FICLONE) first, unless it already failed for this
+    source/destination filesystem pair, then os.copy_file_range, then os.sendfile
+    (which also works across filesystems on kernels older than 5.3), and falls
+    back to shutil.copy2 if none of them is supported for the pair.
+    """
+    try:
+        # Plain fds, no Python file objects: nothing goes through user-space buffers
+        src_fd = os.open(src, os.O_RDONLY | os.O_CLOEXEC)
+        try:
+            dst_fd = os.open(dst, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | os.O_CLOEXEC, 0o644)
+            try:
+                src_st = os.fstat(src_fd)
+                devices = (src_st.st_dev, os.fstat(dst_fd).st_dev)
+                if _reflink_support.get(devices, True):
+                    try:
+                        fcntl.ioctl(dst_fd, FICLONE, src_fd)
+                        _reflink_support[devices] = True
+                        return
+                    except OSError as e:
+                        if e.errno in REFLINK_UNSUPPORTED_ERRNOS:
+                            # Same answer for every other file of this pair, don't ask again
+                            _reflink_support[devices] = False
+                size = src_st.st_size
+                try:
+                    remaining = size
+                    while remaining > 0:
+                        copied = os.copy_file_range(src_fd, dst_fd, remaining)
+                        if copied == 0:
+                            break
+                        remaining -= copied
+                    if remaining == 0:
+                        return
+                except (OSError, AttributeError) as e: # AttributeError: no os.copy_file_range
+                    logger.debug("copy_file_range for %s failed (%s), trying sendfile.", src, e)
+                if _sendfile_copy(src_fd, dst_fd, size):
+                    return
+            finally:
+                os.close(dst_fd)
+        finally:
+            os.close(src_fd)
+    except OSError as e:
+        logger.debug("Kernel-side copy of %s failed (%s), using shutil.copy2.", src, e)
+    shutil.copy2(src, dst)
+
+def _fast_copy2(src, dst):
+    """Copy function: _fast_copy plus the mode and timestamps, like shutil.copy2."""
+    _fast_copy(src, dst)
+    shutil.copystat(src, dst)
+
+def _link_or_copy(src, dst):
+    """Copy function: hardlinks src to dst, copying only if linking isn't possible."""
+    try:
+        os.link(src, dst)
+    except FileExistsError:
+        os.remove(dst)
+        _link_or_copy(src, dst)
+    except OSError as e:
+        if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK):
+            raise
+        _fast_copy2(src, dst)
+
+def _copy_tree(src, dst, copy_function=shutil.copy2):
+    """Copies the tree at src into dst (which may already exist), like copytree with symlinks=True.
+    
+    The source is scanned once up front; all directories are then created
+    shortest-first in one loop before the files are copied or linked, instead
+    of copytree recursing and creating them one level at a time.
+    """
+    dirs, links, files = [], [], []
+    stack = [""]
+    while stack:
+        rel_dir = stack.pop()
+        with os.scandir(os.path.join(src, rel_dir)) as it:
+            for entry in it:
+                rel = os.path.join(rel_dir, entry.name)
+                if entry.is_symlink():
+                    links.append(rel)
+                elif entry.is_dir():
+                    dirs.append(rel)
+                    stack.append(rel)
+                else:
+                    files.append(rel)
+    
+    dirs.sort(key=len)
+    for rel in dirs:
+        try:
+            os.mkdir(os.path.join(dst, rel))
+        except FileExistsError:
+            pass
+    for rel in links:
+        target = os.path.join(dst, rel)
+        if os.path.lexists(target):
+            os.remove(target)
+        os.symlink(os.readlink(os.path.join(src, rel)), target)
+    for rel in files:
+        copy_function(os.path.join(src, rel), os.path.join(dst, rel))
+    # Directory permissions last, like copytree, so read-only dirs don't block the copy
+    for rel in reversed(dirs):
+        try:
+            shutil.copystat(os.path.join(src, rel), os.path.join(dst, rel))
+        except OSError:
+            pass
+
+def _make_executable(path):
+    """Adds the execute bits to path if none are set, returning True if it was changed.
+    
+    Checks and changes the mode through one fd, so the file can't be swapped in between.
+    """
+    fd = os.open(path, os.O_RDONLY | os.O_CLOEXEC)
+    try:
+        mode = os.fstat(fd).st_mode
+        if mode & 0o111:
+            return False
+        os.fchmod(fd, mode | 0o111)
+        return True
+    finally:
+        os.close(fd)
+
+def _read_executable_header(path, size=128):
+    """Returns the first size bytes of path if it is an executable regular file, else None.
+    
+    Type, mode and contents all come from one fd (open, fstat, read, close), so
+    the candidates in _determine_final_paths are checked without separate stat
+    and access calls or a second open.
+    """
+    try:
+        # O_NONBLOCK so a FIFO among the candidates can't block the open
+        fd = os.open(path, os.O_RDONLY | os.O_CLOEXEC | os.O_NONBLOCK)
+    except (OSError, TypeError):
+        return None
+    try:
+        mode = os.fstat(fd).st_mode
+        if not stat.S_ISREG(mode) or not mode & 0o111:
+            return None
+        return os.read(fd, size)
+    except OSError:
+        return None
+    finally:
+        os.close(fd)
+
+def _read_executable_headers(paths):
+    """Runs _read_executable_header over paths, returning the headers in the same order.
+    
+    Long lists are read from a thread pool (the reads release the GIL); short
+    ones are read lazily, so a caller that stops early skips the rest.
+    """
+    if len(paths) < PARALLEL_HEADER_MIN_FILES:
+        return map(_read_executable_header, paths)
+    with ThreadPoolExecutor(max_workers=HEADER_READ_WORKERS) as pool:
+        return list(pool.map(_read_executable_header, paths))
+
+def _dir_entries(directory):
+    """Returns {name: os.DirEntry} for the entries of directory, or None if it can't be read."""
+    try:
+        with os.scandir(directory) as it:
+            return {entry.name: entry for entry in it}
+    except (OSError, TypeError):
+        return None
+
+def _entry_is_executable(entry):
+    """Checks whether a DirEntry (following symlinks) has an execute bit set."""
+    if entry is None:
+        return False
+    try:
+        return bool(entry.stat().st_mode & 0o111)
+    except OSError:
+        return False # Dangling symlink
+
+def _unmount_fuse(mount_point):
+    """Unmounts a FUSE mount point with fusermount (or fusermount3), returning True on success."""
+    for command in ("fusermount", "fusermount3"):
+        if not shutil.which(command):
+            continue
+        try:
+            subprocess.run([command, "-u", mount_point], check=True, timeout=10, stdin=subprocess.DEVNULL,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            return True
+        except (OSError, subprocess.SubprocessError):
+            continue
+    return False
+
+def _remove_stale_tmpfs_dirs():
+    """Removes this user's temp dirs in TMPFS_DIR whose process no longer exists."""
+    uid = os.getuid()
+    try:
+        with os.scandir(TMPFS_DIR) as it:
+            entries = [entry for entry in it if entry.name.startswith(TMPFS_PREFIX)]
+    except OSError:
+        return
+    for entry in entries:
+        pid = entry.name[len(TMPFS_PREFIX):].partition('_')[0]
+        if not pid.isdigit():
+            continue
+        try:
+            if not entry.is_dir(follow_symlinks=False) or entry.stat(follow_symlinks=False).st_uid != uid:
+                continue
+            os.kill(int(pid), 0)
+        except ProcessLookupError:
+            logger.info(f"Removing leftover extraction of a finished process: {entry.path}")
+            _rmtree(entry.path)
+        except OSError:
+            continue # Alive but not ours to signal (EPERM), or gone meanwhile
+
+_fuse_mounts = set() # squashfuse mount points not unmounted yet, see _remove_leftovers_at_exit
+_tmpfs_temp_dirs = set() # tmpfs temp dirs not cleaned up yet, see _remove_leftovers_at_exit
+
+def _remove_leftovers_at_exit():
+    """Unmounts squashfuse mounts and removes tmpfs temp dirs whose installer was never cleaned up.
+    
+    Last resort at exit. The mounts go first, so removing a temp dir never walks
+    into a live mount, and extracted files don't stay in RAM until reboot.
+    """
+    for mount_point in list(_fuse_mounts):
+        _unmount_fuse(mount_point)
+    _fuse_mounts.clear()
+    _join_rmtree_threads()
+    for temp_dir in list(_tmpfs_temp_dirs):
+        _rmtree(temp_dir)
+    _tmpfs_temp_dirs.clear()
+
+atexit.register(_remove_leftovers_at_exit)
+
+def _write_marker_file(marker_path, content):
+    """Writes the .aim_managed marker with a single write, atomically replacing any old one.
+    
+    Written to a temp name and renamed, so a crash never leaves an empty marker.
+    """
+    tmp_marker_path = marker_path + ".tmp"
+    fd = os.open(tmp_marker_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        os.write(fd, content.encode())
+    finally:
+        os.close(fd)
+    os.replace(tmp_marker_path, marker_path)
+
+def _replace_symlink(target, link_name):
+    """Points link_name at target, atomically replacing whatever link_name was before.
+    
+    The link is created under a temporary name (unique per process and call, so
+    concurrent threads don't collide) and renamed over link_name, so there is
+    never a moment without a link.
+    """
+    tmp_link = f"{link_name}.tmp.{_unique_suffix()}"
+    try:
+        os.remove(tmp_link) # Left behind by a crashed run whose pid has been reused
+    except FileNotFoundError:
+        pass
+    os.symlink(target, tmp_link)
+    try:
+        os.replace(tmp_link, link_name)
+    except OSError:
+        os.remove(tmp_link)
+        raise
+
+def _same_filesystem(path, target):
+    """Returns True if path and target (or its nearest existing parent) are on the same filesystem."""
+    while not os.path.exists(target):
+        parent = os.path.dirname(target)
+        if parent == target:
+            break
+        target = parent
+    try:
+        return os.stat(path).st_dev == os.stat(target).st_dev
+    except OSError:
+        return False
+
+def _parse_desktop_bytes(content, source):
+    """Parses the [Desktop Entry] section of raw .desktop file contents.
+    
+    The section is located with a regex over the bytes and only the values of
+    the few keys we need are decoded; source is only used in log messages.
+    """
+    data = dict.fromkeys(DESKTOP_DATA_KEYS)
+    try:
+        header = DESKTOP_ENTRY_HEADER_RE.search(content)
+        if header is None:
+            logger.warning(f"Could not find [Desktop Entry] section in {source}")
+            return data
+        next_section = DESKTOP_SECTION_RE.search(content, header.end())
+        section = content[header.end():next_section.start() if next_section else len(content)]
+        values = {}
+        for line in section.split(b"\n"):
+            key, sep, value = line.partition(b"=")
+            if not sep:
+                continue
+            key = key.strip() # Comment lines never match a key
+            if key in DESKTOP_KEYS and key not in values:
+                values[key] = value.strip().decode('utf-8', errors='replace')
+        data['name'] = values.get(b"Name")
+        data['version'] = values.get(b"X-AppImage-Version", values.get(b"Version")) 
+        data['icon_name'] = values.get(b"Icon")
+        data['exec'] = values.get(b"Exec")
+        if data['exec']:
+            # Only a leading ./ is dropped; usr/... and bare names are already relative
+            exec_value = data['exec']
+            data['exec_relative'] = exec_value[2:] if exec_value.startswith('./') else exec_value
+        
+        # Add sanitized name directly
+        if data['name']:
+            data['name_sanitized'] = sanitize_name(data['name'])
+        
+        logger.debug("Parsed desktop entry: Name='%s', Version='%s', Icon='%s', Exec='%s', ExecRel='%s'", data['name'], data['version'], data['icon_name'], data['exec'], data['exec_relative'])
+    except Exception as e:
+        logger.error(f"Error parsing desktop file {source}: {e}")
+    return data
+
+@functools.lru_cache(maxsize=DESKTOP_CACHE_SIZE)
+def _parse_desktop_entry(desktop_file_path, mtime_ns, size):
+    """Parses a .desktop file; mtime_ns and size only serve as cache key.
+    
+    Read errors propagate as OSError, so a failed read is never cached.
+    """
+    with open(desktop_file_path, 'rb') as f:
+        return _parse_desktop_bytes(f.read(), desktop_file_path)
+
+def _dir_icon_sibling(root, dir_icon_path):
+    """Resolves the usual .DirIcon -> <name>.png link with one readlink and one lstat.
+    
+    Returns:
+        str or None: Path of the regular file in root the link names directly, or
+                     None if the link has to be resolved the long way (realpath)
+    """
+    try:
+        target = os.readlink(dir_icon_path)
+        # A bare file name can't leave root or pass through another link on the way
+        if not target or '/' in target or target in ('.', '..'):
+            return None
+        path = os.path.join(root, target)
+        return path if stat.S_ISREG(os.lstat(path).st_mode) else None
+    except OSError:
+        return None
+
+def _icon_pattern_extracted(root, pattern):
+    """Checks whether a selective extraction of the icon glob pattern yielded an icon in root."""
+    path = os.path.join(root, pattern)
+    if pattern.endswith("/*"):
+        try:
+            with os.scandir(os.path.dirname(path)) as it:
+                return any(entry.is_file() for entry in it)
+        except OSError:
+            return False
+    # A .DirIcon link into a part of the tree that wasn't extracted doesn't count
+    return os.path.isfile(path)
+
+def _find_squashfs_desktop_entry(image):
+    """Returns the first .desktop file entry in the root directory of a squashfs image, or None."""
+    for entry in image.root:
+        if not entry.is_dir and DESKTOP_RE.match(entry.name):
+            return entry
+    return None
+
+def _icon_candidates(entries, icon_name):
+    """Returns (file name, path) of the list_dir entries that could be the icon named icon_name.
+    
+    Those are files named icon_name and icon files whose name starts with it
+    (case-insensitively).
+    """
+    icon_name_lower = icon_name.lower()
+    return [(name, path) for name, path, is_dir in entries or ()
+            if not is_dir and (name == icon_name or (name.lower().startswith(icon_name_lower)
+                                                      and ICON_RE.match(name)))]
+
+def _pick_icon(entries, icon_name):
+    """Picks the icon for icon_name from (file name, path) pairs of one directory.
+    
+    Returns:
+        str or None: Path of the exact name match, else the match with the most
+                     preferred extension in ICON_EXTS, else None
+    """
+    ext_matches = {}
+    for name, path in entries:
+        if name == icon_name:
+            if os.path.isfile(path):
+                return path
+            continue
+        # Split instead of ICON_RE: only "<icon_name>.<ext>" can match, a dict lookup decides the rest
+        base, _, ext = name.rpartition('.')
+        if base == icon_name:
+            ext_matches.setdefault(ext.lower(), path)
+    for ext in ICON_EXTS:
+        path = ext_matches.get(ext)
+        if path and os.path.isfile(path):
+            return path
+    return None
+
+def _get_squashfs_offset(appimage_path):
+    """Returns the offset of the squashfs image embedded in a type 2 AppImage.
+    
+    The squashfs image starts right after the ELF runtime, i.e. at the end of
+    the section header table (e_shoff + e_shentsize * e_shnum).
+    
+    Returns:
+        int or None: Offset in bytes, or None if no squashfs image was found there
+    """
+    try:
+        with open(appimage_path, 'rb') as f:
+            header = f.read(64)
+            if len(header) < 64 or header[:4] != b'\x7fELF':
+                return None
+            endian = '<' if header[5] == 1 else '>'
+            if header[4] == 2: # ELFCLASS64
+                shoff, = struct.unpack_from(endian + 'Q', header, 0x28)
+                shentsize, shnum = struct.unpack_from(endian + 'HH', header, 0x3A)
+            elif header[4] == 1: # ELFCLASS32
+                shoff, = struct.unpack_from(endian + 'I', header, 0x20)
+                shentsize, shnum = struct.unpack_from(endian + 'HH', header, 0x2E)
+            else:
+                return None
+            offset = shoff + shentsize * shnum
+            f.seek(offset)
+            if f.read(4) != SQUASHFS_MAGIC:
+                return None
+            return offset
+    except (OSError, struct.error) as e:
+        logger.debug("Could not determine squashfs offset for %s: %s", appimage_path, e)
+        return None
+
+def _get_appimage_type(appimage_path):
+    """Reads the AppImage type (1 = ISO 9660, 2 = squashfs) from the ELF header.
+    
+    Returns:
+        int or None: The type, or None if the file carries no AppImage magic
+    """
+    try:
+        with open(appimage_path, 'rb') as f:
+            f.seek(8)
+            magic = f.read(3)
+    except OSError as e:
+        logger.debug("Could not read AppImage type of %s: %s", appimage_path, e)
+        return None
+    if len(magic) < 3 or magic[:2] != APPIMAGE_MAGIC:
+        return None
+    return magic[2]
+
+def _drain_lines(stream, lines):
+    """Reads a binary pipe line by line into lines (a list or bounded deque) until EOF, then closes it."""
+    with stream:
+        for line in iter(stream.readline, b""):
+            lines.append(line)
+
+@functools.lru_cache(maxsize=1)
+def _extract_env():
+    """Returns the environment for --appimage-extract runs, built once.
+    
+    DISPLAY and WAYLAND_DISPLAY are removed so the AppImage can't launch its
+    GUI. subprocess only reads the dict, so callers share it; don't modify it.
+    The app never changes os.environ after start-up, so it is snapshot once.
+    """
+    env = dict(os.environ)
+    env["APPIMAGE_EXTRACT_AND_RUN"] = "0"
+    env["NO_CLEANUP"] = "1"
+    env.pop("DISPLAY", None)
+    env.pop("WAYLAND_DISPLAY", None)
+    return env
+
+def _run_subprocess_non_blocking(cmd, cwd=None, timeout=60, env=None, check_interval=0.1, capture_stdout=True):
     """Run a subprocess without blocking the UI thread.
     
-    Uses Popen with polling and QApplication.processEvents() to keep UI responsive
-    during long-running operations like AppImage extraction.
+    On the GUI thread, Qt events are processed every check_interval while waiting
+    for the process, to keep the UI responsive during long-running operations like
+    AppImage extraction. Other threads (or headless use) block in wait() until
+    the process exits or times out.
     
     Args:
         cmd: Command list to execute
         cwd: Working directory
         timeout: Maximum time to wait (seconds)
         env: Environment variables
-        check_interval: How often to check process status (seconds)
+        check_interval: Longest wait between Qt event processing on the GUI thread (seconds)
+        capture_stdout: If False, stdout is discarded and returned as None
         
     Returns:
-        tuple: (return_code, stdout, stderr) or (None, None, error_msg) on timeout
+        tuple: (return_code, stdout, stderr) or (None, None, error_msg) on timeout.
+        stderr is only decoded for a non-zero return code and is "" otherwise.
+        
+    The output pipes are drained line by line by reader threads while the process
+    runs, so a chatty process can never block on a full pipe. Only the last
+    STDERR_TAIL_LINES lines of stderr are kept.
     """
-    try:
-        # Try to import QApplication for UI responsiveness
-        from PyQt6.QtWidgets import QApplication
-        has_qt = True
-    except ImportError:
-        has_qt = False
+    # Only the GUI thread may process events; everyone else just blocks in wait()
+    app = None
+    if QApplication is not None and threading.current_thread() is threading.main_thread():
+        app = QApplication.instance()
     
+    process = None
     try:
         process = subprocess.Popen(
             cmd,
             cwd=cwd,
-            stdout=subprocess.PIPE,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE if capture_stdout else subprocess.DEVNULL,
             stderr=subprocess.PIPE,
             env=env
         )
+        # stderr only feeds error messages, so just its tail is kept
+        stdout_lines, stderr_lines = [], deque(maxlen=STDERR_TAIL_LINES)
+        readers = [threading.Thread(target=_drain_lines, args=(stream, lines), daemon=True)
+                   for stream, lines in ((process.stdout, stdout_lines), (process.stderr, stderr_lines))
+                   if stream is not None]
+        for reader in readers:
+            reader.start()
         
-        start_time = time.time()
+        deadline = time.monotonic() + timeout
         while True:
-            # Check if process has completed
-            return_code = process.poll()
-            if return_code is not None:
-                # Process completed
-                stdout, stderr = process.communicate()
-                return return_code, stdout.decode('utf-8', errors='replace'), stderr.decode('utf-8', errors='replace')
-            
-            # Check timeout
-            elapsed = time.time() - start_time
-            if elapsed > timeout:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
                 process.kill()
                 process.wait()
+                for reader in readers:
+                    reader.join(timeout=1) # Leftover children may still hold the pipe open
                 return None, None, f"Process timed out after {timeout}s"
-            
-            # Keep UI responsive
-            if has_qt:
-                app = QApplication.instance()
+            try:
+                # wait() returns as soon as the process exits instead of after a full sleep
+                return_code = process.wait(timeout=min(check_interval, remaining) if app else remaining)
+            except subprocess.TimeoutExpired:
                 if app:
-                    app.processEvents()
-            
-            # Small sleep to avoid busy-waiting
-            time.sleep(check_interval)
+                    app.processEvents() # Keep UI responsive
+                continue
+            for reader in readers:
+                reader.join()
+            stdout = b"".join(stdout_lines).decode('utf-8', errors='replace') if capture_stdout else None
+            stderr = b"".join(stderr_lines).decode('utf-8', errors='replace') if return_code else ""
+            return return_code, stdout, stderr
             
     except Exception as e:
+        if process is not None and process.poll() is None:
+            # Don't leave the child running behind an error (e.g. a failing processEvents)
+            process.kill()
+            process.wait()
         return None, None, str(e)
 
 class AppImageInstaller:
     def __init__(self, appimage_path, install_mode="user", custom_install_path=None):
-        logger.debug(f"Entering __init__ for {appimage_path}, mode={install_mode}, custom_path={custom_install_path}")
+        logger.debug("Entering __init__ for %s, mode=%s, custom_path=%s", appimage_path, install_mode, custom_install_path)
         # --- Basic Initialization ---
         self.appimage_path = appimage_path
-        if not appimage_path or not os.path.isfile(self.appimage_path):
+        self._appimage_type = None # Read lazily by _is_type1_appimage
+        self._squashfs_offset = -1 # Read lazily by _squashfs_image_offset; -1 = not read yet
+        self._squashfuse_mount = None # Set if extract_appimage mounted the image instead of extracting it
+        if not appimage_path or not os.path.isfile(appimage_path):
             raise FileNotFoundError(f"AppImage file not found or invalid: {appimage_path}")
             
         self.install_mode = install_mode
@@ -90,17 +779,23 @@ class AppImageInstaller:
         self.app_info = {} # Initialize app_info dictionary
         self.extract_dir = None # Directory where AppImage is extracted
         self.temp_dir = None # General temporary directory for quick extracts
-        self.temp_files = [] # List to track temporary files/dirs for cleanup
+        self.temp_files = {} # path -> "file"|"dir", removed on cleanup; a dict so re-registering a path is a no-op
         self.extracted_desktop_path = None # Path to the desktop file found during extraction
+        self._extracted_desktop_relative = None # Same file, relative to extract_dir (full extraction only)
         self.final_executable_path = None
         self.final_desktop_path = None
         self.final_icon_path = None
         self.temp_preview_icon_path = None # Path to temporarily extracted icon for preview
+        self.metadata_squashfs_root = None # Tree read_metadata extracted into (may be partial)
+        self._metadata_tree_complete = False # read_metadata fell back to a full extraction
+        self._icon_resolution_cache = {} # (squashfs_root, icon_name) -> icon path or None
+        self._desktop_link_filename = None # (app name, file name) from _get_desktop_link_filename
         self.symlinks_created = [] # Track created symlinks (mainly for non-root removal)
         self.bin_symlink_target = None # Initialize symlink target
         self.final_copied_desktop_path = None # Initialize path for created desktop file
+        self._paths_cache_key = None # (name, version) the install/bin paths were computed for
 
-        logger.debug(f"Initializing AppImageInstaller for '{self.appimage_path}'...")
+        logger.debug("Initializing AppImageInstaller for '%s'...", self.appimage_path)
 
         # --- Determine Base Paths --- 
         self._determine_base_paths()
@@ -108,8 +803,8 @@ class AppImageInstaller:
         # --- Check root requirement based on determined paths (can be preliminary) ---
         self._check_root_requirement_based_on_paths()
 
-        logger.debug(f"AppImageInstaller initialized for '{self.appimage_path}'. Mode: {self.install_mode}")
-        logger.debug(f"Exiting __init__")
+        logger.debug("AppImageInstaller initialized for '%s'. Mode: %s", self.appimage_path, self.install_mode)
+        logger.debug("Exiting __init__")
 
     def _determine_base_paths(self):
         """Determines base installation prefix and link directories based on mode."""
@@ -127,44 +822,47 @@ class AppImageInstaller:
             self.base_install_prefix = os.path.join(config.USER_HOME, ".local/share", config.APP_DIR_NAME) 
             self.bin_link_dir = os.path.join(config.USER_HOME, ".local/bin")
             self.desktop_link_dir = os.path.join(config.USER_HOME, ".local/share/applications")
-        logger.debug(f"Base install prefix: {self.base_install_prefix}")
-        logger.debug(f"Bin link dir: {self.bin_link_dir}")
-        logger.debug(f"Desktop link dir: {self.desktop_link_dir}")
+        logger.debug("Base install prefix: %s", self.base_install_prefix)
+        logger.debug("Bin link dir: %s", self.bin_link_dir)
+        logger.debug("Desktop link dir: %s", self.desktop_link_dir)
     
     def _extract_initial_metadata(self):
-        """Extracts basic metadata (.desktop file) without full extraction."""
+        """Extracts basic metadata (.desktop file) without full extraction.
+        
+        Intended for preview only. If a full extraction already located the
+        .desktop file, that file is parsed instead of spawning the AppImage again.
+        """
+        if (self.extract_dir and self.extracted_desktop_path
+                and self.extracted_desktop_path.startswith(self.extract_dir)
+                and os.path.isfile(self.extracted_desktop_path)):
+            logger.debug("Reusing desktop file from full extraction: %s", self.extracted_desktop_path)
+            return self._parse_desktop_file(self.extracted_desktop_path)
+
+        metadata = self._parse_desktop_file_from_squashfs()
+        if metadata is not None:
+            return metadata
+
         logger.info(f"Extracting initial metadata from {self.appimage_path}")
         metadata = {}
         self._ensure_temp_dir() 
         extract_meta_dir = os.path.join(self.temp_dir, "meta_extract")
         if os.path.exists(extract_meta_dir): shutil.rmtree(extract_meta_dir)
         os.makedirs(extract_meta_dir)
-        self.temp_files.append(extract_meta_dir)
+        self.temp_files[extract_meta_dir] = "dir"
 
         try:
             extract_command = [self.appimage_path, f"--appimage-extract=*.desktop"]
-            # Create environment that prevents AppImage from launching GUI
-            extract_env = os.environ.copy()
-            extract_env["APPIMAGE_EXTRACT_AND_RUN"] = "0"
-            extract_env["NO_CLEANUP"] = "1"
-            extract_env.pop("DISPLAY", None)  # Remove DISPLAY to prevent GUI launch
-            extract_env.pop("WAYLAND_DISPLAY", None)  # Also remove Wayland display
-            result = subprocess.run(extract_command, cwd=extract_meta_dir, check=False, 
-                                   capture_output=True, text=True, timeout=15, env=extract_env)
+            extract_env = _extract_env() # Keeps the AppImage from launching its GUI
+            result = subprocess.run(extract_command, cwd=extract_meta_dir, check=False, stdin=subprocess.DEVNULL,
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, timeout=15, env=extract_env)
 
             if result.returncode == 0:
                 squashfs_root = os.path.join(extract_meta_dir, "squashfs-root")
                 if os.path.isdir(squashfs_root):
-                    found_desktop = None
-                    for root, _, files in os.walk(squashfs_root):
-                        for file in files:
-                            if file.lower().endswith(".desktop"):
-                                found_desktop = os.path.join(root, file)
-                                logger.debug(f"Found potential desktop file: {found_desktop}")
-                                break # Inner loop
-                        if found_desktop: break # Outer loop
-                        
+                    # The top level is checked before recursing, which covers the usual squashfs-root/*.desktop
+                    found_desktop = find_first_matching(squashfs_root, DESKTOP_RE, prune=DESKTOP_PRUNE_DIRS)
                     if found_desktop:
+                        logger.debug("Found potential desktop file: %s", found_desktop)
                         self.extracted_desktop_path = found_desktop 
                         metadata = self._parse_desktop_file(found_desktop)
                     else: 
@@ -172,7 +870,7 @@ class AppImageInstaller:
                 else: 
                     logger.warning("Extraction command succeeded but squashfs-root not found in meta_extract.")
             else: 
-                stderr_output = result.stderr.strip() if result.stderr else ""
+                stderr_output = result.stderr.decode('utf-8', errors='replace').strip() if result.stderr else ""
                 log_msg = f"Failed to extract .desktop file (Code: {result.returncode})"
                 if stderr_output and "No such file" not in stderr_output:
                     log_msg += f": {stderr_output}"
@@ -184,38 +882,18 @@ class AppImageInstaller:
         return metadata
 
     def _parse_desktop_file(self, desktop_file_path):
-        """Parses a .desktop file and returns key information."""
-        parser = configparser.ConfigParser(interpolation=None)
-        parser.optionxform = str 
-        data = {"name": None, "version": None, "icon_name": None, "exec": None, "exec_relative": None}
+        """Parses a .desktop file and returns key information.
+        
+        Parsed results are cached per (path, mtime, size), so parsing the same
+        unchanged file again (e.g. preview followed by install) is free.
+        """
         try:
-            parser.read(desktop_file_path, encoding='utf-8')
-            if 'Desktop Entry' in parser:
-                entry = parser['Desktop Entry']
-                data['name'] = entry.get("Name")
-                data['version'] = entry.get("X-AppImage-Version", entry.get("Version")) 
-                data['icon_name'] = entry.get("Icon")
-                data['exec'] = entry.get("Exec")
-                if data['exec']:
-                    if '/' not in data['exec']:
-                        data['exec_relative'] = data['exec']
-                    else:
-                        parts = data['exec'].split('/')
-                        if len(parts) > 1 and parts[0] in ['.', 'usr']:
-                            data['exec_relative'] = '/'.join(parts[1:]) if parts[0]=='.' else '/'.join(parts)
-                        else:
-                            data['exec_relative'] = data['exec'] 
-                
-                # Add sanitized name directly
-                if data['name']:
-                    data['name_sanitized'] = sanitize_name(data['name'])
-                
-                logger.debug(f"Parsed desktop entry: Name='{data['name']}', Version='{data['version']}', Icon='{data['icon_name']}', Exec='{data['exec']}', ExecRel='{data['exec_relative']}'")
-            else:
-                logger.warning(f"Could not find [Desktop Entry] section in {desktop_file_path}")
-        except Exception as e:
+            st = os.stat(desktop_file_path)
+            # Copy, so callers can't modify the cached entry
+            return dict(_parse_desktop_entry(desktop_file_path, st.st_mtime_ns, st.st_size))
+        except OSError as e:
             logger.error(f"Error parsing desktop file {desktop_file_path}: {e}")
-        return data
+            return dict.fromkeys(DESKTOP_DATA_KEYS)
 
     def _get_app_specific_install_dir(self):
         """Determines the specific installation directory based on app name.
@@ -226,7 +904,7 @@ class AppImageInstaller:
             logger.error("Cannot determine app-specific dir: App name is missing from app_info.")
             return None 
 
-        sanitized_app_name = sanitize_name(app_name) 
+        sanitized_app_name = self._get_sanitized_name()
         if not sanitized_app_name:
             logger.error("Cannot determine app-specific dir: Sanitized app name is empty.")
             return None # Or use a fallback?
@@ -236,7 +914,7 @@ class AppImageInstaller:
         if version_raw:
             # Simple cleaning for version: replace known problematic chars with underscore
             # Keep dots, allow alphanumeric, underscore, hyphen.
-            cleaned_version = re.sub(r'[^a-zA-Z0-9_\-\.]', '_', str(version_raw))
+            cleaned_version = VERSION_CLEAN_RE.sub('_', str(version_raw))
             cleaned_version = cleaned_version.strip('_-') # Remove leading/trailing separators
             if not cleaned_version: # Handle case where cleaning results in empty string
                 cleaned_version = "unknown"
@@ -255,18 +933,54 @@ class AppImageInstaller:
             return None
             
         final_path = os.path.join(self.base_install_prefix, dir_name)
-        logger.debug(f"Determined app specific install dir: {final_path} (Name: '{sanitized_app_name}', Version: '{version_part}')")
+        logger.debug("Determined app specific install dir: %s (Name: '%s', Version: '%s')", final_path, sanitized_app_name, version_part)
         return final_path
          
+    def _recompute_paths(self):
+        """Updates app_install_dir and the bin symlink target, unless name and version are unchanged."""
+        key = (self.app_info.get('name'), self.app_info.get('version'))
+        if key == self._paths_cache_key:
+            logger.debug("Install paths already computed for %s, skipping.", key)
+            return
+        self.app_install_dir = self._get_app_specific_install_dir()
+        self._determine_final_paths_placeholder()
+        self._paths_cache_key = key
+
+    def _get_sanitized_name(self):
+        """Returns the sanitized app name, computing it once and keeping it in app_info['name_sanitized']."""
+        app_name = self.app_info.get('name')
+        if not app_name:
+            return None
+        sanitized = self.app_info.get('name_sanitized')
+        if not sanitized:
+            sanitized = sanitize_name(app_name)
+            if sanitized:
+                self.app_info['name_sanitized'] = sanitized
+        return sanitized
+
+    def _get_desktop_link_filename(self):
+        """Returns the appimagekit_<name>.desktop file name for the desktop link, or None.
+        
+        Falls back to the AppImage file name when the app name is unknown. The
+        result is kept until the app name changes.
+        """
+        app_name = self.app_info.get('name')
+        if self._desktop_link_filename is None or self._desktop_link_filename[0] != app_name:
+            sanitized_app_name = self._get_sanitized_name() or sanitize_name(
+                APPIMAGE_SUFFIX_RE.sub('', os.path.basename(self.appimage_path)))
+            desktop_filename = f"appimagekit_{sanitized_app_name}.desktop" if sanitized_app_name else None
+            self._desktop_link_filename = (app_name, desktop_filename)
+        return self._desktop_link_filename[1]
+
     def _determine_final_paths_placeholder(self):
         """Calculates the target symlink path (used before full install/extraction)."""
         self.bin_symlink_target = None
         app_name = self.app_info.get('name')
         if app_name and self.bin_link_dir:
-            sanitized = sanitize_name(app_name)
+            sanitized = self._get_sanitized_name()
             if sanitized:
                 self.bin_symlink_target = os.path.join(self.bin_link_dir, sanitized)
-                logger.debug(f"Determined preliminary bin symlink target: {self.bin_symlink_target}")
+                logger.debug("Determined preliminary bin symlink target: %s", self.bin_symlink_target)
             else:
                 logger.warning(f"Could not determine preliminary bin symlink target (sanitized name is empty for '{app_name}').")
         else:
@@ -286,146 +1000,160 @@ class AppImageInstaller:
         else:
             # Look for the executable in different possible locations
             exec_relative = self.app_info['exec_relative']
-            app_name_sanitized = self.app_info.get('name_sanitized', '').lower()
+            app_name_sanitized = (self._get_sanitized_name() or '').lower()
+            # Fixed relative parts are appended to the install dir prefix directly;
+            # exec_relative still goes through os.path.join in case it is absolute
+            install_prefix = os.path.join(self.app_install_dir, "")
             
             # Possible paths for executable (in priority order):
             # 1. In usr/bin (common structure for traditional AppImages)
-            usr_bin_path = os.path.join(self.app_install_dir, "usr/bin", exec_relative)
+            usr_bin_path = os.path.join(install_prefix + "usr/bin", exec_relative)
             
             # 2. In app/ directory (common for Electron apps)
-            app_dir_path = os.path.join(self.app_install_dir, "app", app_name_sanitized) if app_name_sanitized else None
+            app_dir_path = install_prefix + "app/" + app_name_sanitized if app_name_sanitized else None
             
             # 3. Direct in app dir (legacy support - AppRun)
-            direct_path = os.path.join(self.app_install_dir, exec_relative)
+            direct_path = os.path.join(install_prefix, exec_relative)
             
             # 4. Check for AppRun.wrapped which might point to the correct executable
-            apprun_wrapped_path = os.path.join(self.app_install_dir, "AppRun.wrapped")
+            apprun_wrapped_path = install_prefix + "AppRun.wrapped"
             
             # Helper function to check if a file is a real executable binary (not a shell script for desktop integration)
-            def is_real_executable(path):
-                if not path or not os.path.exists(path) or not os.path.isfile(path):
+            # Default of is_real_executable's header: None is a valid pre-read result ("not executable")
+            header_not_read = object()
+            def is_real_executable(path, header=header_not_read):
+                if header is header_not_read:
+                    header = _read_executable_header(path)
+                if header is None:
                     return False
-                # Check if it's executable
-                if not os.access(path, os.X_OK):
-                    return False
-                # Check if it's a shell script (AppRun integration scripts often are)
-                try:
-                    with open(path, 'rb') as f:
-                        header = f.read(128)
-                        # Check for shell script shebang
-                        if header.startswith(b'#!/'):
-                            # This is likely a shell script, check if it's an integration script
-                            if b'desktop' in header.lower() or b'appimage' in header.lower():
-                                return False  # Skip integration scripts
-                        # ELF binary
-                        if header.startswith(b'\x7fELF'):
-                            return True
-                        # Could be a script that actually runs the app
-                        return True
-                except (IOError, OSError):
+                if header.startswith(b'\x7fELF'):
+                    return True
+                # Skip shell scripts doing desktop integration (AppRun often is one)
+                if header.startswith(b'#!/') and SHEBANG_INTEGRATION_RE.search(header):
                     return False
+                # Could be a script that actually runs the app
                 return True
             
             # Decide which path to use by checking existence
             self.final_executable_path = None
             
-            if os.path.exists(self.app_install_dir):
-                # Priority 1: Check usr/bin
-                if os.path.exists(usr_bin_path) and is_real_executable(usr_bin_path):
-                    self.final_executable_path = usr_bin_path
-                    logger.debug(f"Found executable in usr/bin: {self.final_executable_path}")
-                
-                # Priority 2: Check AppRun FIRST - this is the standard AppImage entry point
-                # AppRun is a shell script or symlink that sets up the environment properly
-                elif os.path.exists(direct_path) and os.access(direct_path, os.X_OK):
-                    self.final_executable_path = direct_path
-                    logger.debug(f"Found AppRun executable: {self.final_executable_path}")
-                
-                # Priority 3: Check AppRun.wrapped symlink (some AppImages use this pattern)
-                elif os.path.islink(apprun_wrapped_path):
+            # One listing of the install dir (and of app/) answers the existence, type
+            # and mode checks below, instead of a stat per candidate
+            install_entries = _dir_entries(self.app_install_dir)
+            if install_entries is not None:
+                app_entry = install_entries.get("app")
+                app_subdir_exists = app_entry is not None and app_entry.is_dir()
+
+                # Each priority returns the executable it found, or None to fall through to the next
+                def from_usr_bin():
+                    # Priority 1: Check usr/bin
+                    if "usr" in install_entries and is_real_executable(usr_bin_path):
+                        return usr_bin_path
+                    return None
+
+                def from_apprun():
+                    # Priority 2: Check AppRun FIRST - this is the standard AppImage entry point
+                    # AppRun is a shell script or symlink that sets up the environment properly
+                    if os.sep not in exec_relative:
+                        found = _entry_is_executable(install_entries.get(exec_relative))
+                    else:
+                        found = os.access(direct_path, os.X_OK) # X_OK fails for missing paths too
+                    return direct_path if found else None
+
+                def from_apprun_wrapped():
+                    # Priority 3: Check AppRun.wrapped symlink (some AppImages use this pattern)
+                    wrapped_entry = install_entries.get("AppRun.wrapped")
+                    if wrapped_entry is None or not wrapped_entry.is_symlink():
+                        return None
                     try:
                         wrapped_target = os.readlink(apprun_wrapped_path)
-                        target_path = os.path.normpath(os.path.join(self.app_install_dir, wrapped_target))
-                        if os.path.exists(target_path) and is_real_executable(target_path):
-                            self.final_executable_path = target_path
-                            logger.debug(f"Found executable via AppRun.wrapped symlink: {self.final_executable_path}")
-                    except (OSError, IOError) as e:
+                    except OSError as e:
                         logger.warning(f"Failed to read AppRun.wrapped symlink: {e}")
-                
-                # Priority 4: Check app/ directory for main binary (Electron apps)
-                # Skip .so files as they are shared libraries, not executables
-                elif app_dir_path and os.path.exists(app_dir_path) and is_real_executable(app_dir_path):
-                    self.final_executable_path = app_dir_path
-                    logger.debug(f"Found executable in app/ (Electron): {self.final_executable_path}")
-                
-                # Priority 5: Search app/ directory for any executable matching app name
-                # But skip shared libraries (.so files)
-                elif os.path.isdir(os.path.join(self.app_install_dir, "app")):
-                    app_subdir = os.path.join(self.app_install_dir, "app")
-                    for item in os.listdir(app_subdir):
-                        # Skip shared libraries
-                        if item.endswith('.so') or '.so.' in item:
-                            continue
-                        item_path = os.path.join(app_subdir, item)
-                        if os.path.isfile(item_path) and is_real_executable(item_path):
-                            # Check if the name matches approximately
+                        return None
+                    target_path = os.path.normpath(os.path.join(self.app_install_dir, wrapped_target))
+                    return target_path if is_real_executable(target_path) else None
+
+                def from_app_dir():
+                    # Priority 4: Check app/ directory for main binary (Electron apps)
+                    if app_subdir_exists and app_dir_path and is_real_executable(app_dir_path):
+                        return app_dir_path
+                    return None
+
+                def from_app_dir_scan():
+                    # Priority 5: Search app/ directory for any executable matching app name
+                    if not app_subdir_exists:
+                        return None
+                    # Skip shared libraries (.so files) and directories
+                    candidates = [(item, item_entry.path)
+                                  for item, item_entry in (_dir_entries(app_entry.path) or {}).items()
+                                  if not (item.endswith('.so') or '.so.' in item or item_entry.is_dir())]
+                    headers = _read_executable_headers([item_path for _, item_path in candidates])
+                    for (item, item_path), header in zip(candidates, headers):
+                        if is_real_executable(item_path, header):
+                            # Check if the name matches approximately (app_name_sanitized is lowercase);
+                            # only names no longer than the app name can be contained in it
                             item_lower = item.lower()
-                            if app_name_sanitized and (app_name_sanitized in item_lower or item_lower in app_name_sanitized):
-                                self.final_executable_path = item_path
-                                logger.debug(f"Found executable in app/ by name match: {self.final_executable_path}")
-                                break
+                            if app_name_sanitized and (app_name_sanitized in item_lower
+                                                       or (len(item) <= len(app_name_sanitized)
+                                                           and item_lower in app_name_sanitized)):
+                                return item_path
                             # Or just take the first real ELF binary found in app/ (not a .so)
-                            try:
-                                with open(item_path, 'rb') as f:
-                                    if f.read(4) == b'\x7fELF':
-                                        self.final_executable_path = item_path
-                                        logger.debug(f"Found ELF executable in app/: {self.final_executable_path}")
-                                        break
-                            except (IOError, OSError):
-                                pass
+                            if header.startswith(b'\x7fELF'):
+                                return item_path
+                    return None
+
+                for location, find_executable in (("usr/bin", from_usr_bin), ("AppRun", from_apprun),
+                                                  ("AppRun.wrapped", from_apprun_wrapped),
+                                                  ("app/ (Electron)", from_app_dir), ("app/ scan", from_app_dir_scan)):
+                    self.final_executable_path = find_executable()
+                    if self.final_executable_path:
+                        logger.debug("Found executable via %s: %s", location, self.final_executable_path)
+                        break
             
             # Fallback: If nothing found and directory doesn't exist yet (new installation)
             if not self.final_executable_path:
                 # For new installations, try to determine based on app structure in extract_dir
-                if self.extract_dir and os.path.isdir(self.extract_dir):
+                extract_entries = _dir_entries(self.extract_dir) if self.extract_dir else None
+                if extract_entries is not None:
+                    extract_app_entry = extract_entries.get("app")
                     # First check for AppRun in extract_dir
-                    extract_apprun = os.path.join(self.extract_dir, "AppRun")
-                    if os.path.exists(extract_apprun) and os.access(extract_apprun, os.X_OK):
-                        self.final_executable_path = os.path.join(self.app_install_dir, "AppRun")
-                        logger.debug(f"Determined AppRun from extract: {self.final_executable_path}")
+                    if _entry_is_executable(extract_entries.get("AppRun")):
+                        self.final_executable_path = install_prefix + "AppRun"
+                        logger.debug("Determined AppRun from extract: %s", self.final_executable_path)
                     # Check extract_dir for app/ structure (fallback)
-                    elif os.path.isdir(os.path.join(self.extract_dir, "app")):
-                        extract_app_dir = os.path.join(self.extract_dir, "app")
-                        for item in os.listdir(extract_app_dir):
-                            # Skip shared libraries
-                            if item.endswith('.so') or '.so.' in item:
+                    elif extract_app_entry is not None and extract_app_entry.is_dir():
+                        for item, item_entry in (_dir_entries(extract_app_entry.path) or {}).items():
+                            # Skip shared libraries and directories
+                            if item.endswith('.so') or '.so.' in item or item_entry.is_dir():
                                 continue
-                            item_path = os.path.join(extract_app_dir, item)
-                            if os.path.isfile(item_path) and is_real_executable(item_path):
+                            if is_real_executable(item_entry.path):
                                 # Use the relative path from install dir
-                                self.final_executable_path = os.path.join(self.app_install_dir, "app", item)
-                                logger.debug(f"Determined executable from extract (app/): {self.final_executable_path}")
+                                self.final_executable_path = install_prefix + "app/" + item
+                                logger.debug("Determined executable from extract (app/): %s", self.final_executable_path)
                                 break
                 
                 # Ultimate fallback: usr/bin path
                 if not self.final_executable_path:
                     self.final_executable_path = usr_bin_path
-                    logger.debug(f"Using default usr/bin location for executable: {self.final_executable_path}")
+                    logger.debug("Using default usr/bin location for executable: %s", self.final_executable_path)
             
-            logger.debug(f"Calculated final executable path: {self.final_executable_path}")
+            logger.debug("Calculated final executable path: %s", self.final_executable_path)
 
-        # Calculate expected desktop file path *within* the install directory
-        desktop_filename = self._find_desktop_file_in_dir(self.app_install_dir, return_relative=True)
+        # Calculate expected desktop file path *within* the install directory.
+        # Reuse the location found during extraction; only scan for pre-existing installs.
+        desktop_filename = self._extracted_desktop_relative
+        if not desktop_filename:
+            desktop_filename = self._find_desktop_file_in_dir(self.app_install_dir, return_relative=True)
         if desktop_filename:
              # Use the actual relative path if found (e.g. after extraction to temp)
              self.final_desktop_path = os.path.join(self.app_install_dir, desktop_filename)
-             logger.debug(f"Calculated final desktop path (found relative): {self.final_desktop_path}")
+             logger.debug("Calculated final desktop path (found relative): %s", self.final_desktop_path)
         elif self.extracted_desktop_path and self.extract_dir and self.extracted_desktop_path.startswith(self.extract_dir):
              # Fallback: If we have the path from a temp extraction, calculate relative from that
              try:
                   relative_desktop_path = os.path.relpath(self.extracted_desktop_path, self.extract_dir)
                   self.final_desktop_path = os.path.join(self.app_install_dir, relative_desktop_path)
-                  logger.debug(f"Calculated final desktop path (from temp relative): {self.final_desktop_path}")
+                  logger.debug("Calculated final desktop path (from temp relative): %s", self.final_desktop_path)
              except ValueError:
                   logger.warning("Could not determine relative desktop path from temp extraction.")
                   self.final_desktop_path = None
@@ -447,33 +1175,30 @@ class AppImageInstaller:
         # Placeholder determination remains separate as it only needs the name
         self._determine_final_paths_placeholder()
 
-        logger.debug(f"Post-extraction Info: Name='{self.app_info.get('name')}', InstallDir='{self.app_install_dir}', BinLink='{self.bin_symlink_target}', FinalExec='{self.final_executable_path}', FinalDesktop='{self.final_desktop_path}'")
+        logger.debug("Post-extraction Info: Name='%s', InstallDir='%s', BinLink='%s', FinalExec='%s', FinalDesktop='%s'", self.app_info.get('name'), self.app_install_dir, self.bin_symlink_target, self.final_executable_path, self.final_desktop_path)
         return True # Extraction successful
 
     def _find_desktop_file_in_dir(self, search_dir, return_relative=False):
         """Scans a directory for the first .desktop file found."""
         if not search_dir or not os.path.isdir(search_dir):
-            logger.debug(f"_find_desktop_file_in_dir: Search directory invalid or doesn't exist: {search_dir}")
+            logger.debug("_find_desktop_file_in_dir: Search directory invalid or doesn't exist: %s", search_dir)
             return None
 
-        logger.debug(f"Scanning for desktop file in: {search_dir}")
-        for root, _, files in os.walk(search_dir):
-            for file in files:
-                if file.lower().endswith(".desktop"):
-                    full_path = os.path.join(root, file)
-                    logger.debug(f"Found desktop file: {full_path}")
-                    if return_relative:
-                        try:
-                            relative_path = os.path.relpath(full_path, search_dir)
-                            logger.debug(f"Returning relative path: {relative_path}")
-                            return relative_path
-                        except ValueError as e:
-                            logger.warning(f"Could not get relative path for {full_path} from {search_dir}: {e}")
-                            return None # Fallback if relpath fails
-                    else:
-                        logger.debug(f"Returning full path: {full_path}")
-                        return full_path
-        logger.debug(f"No desktop file found in {search_dir}")
+        logger.debug("Scanning for desktop file in: %s", search_dir)
+        full_path = find_first_matching(search_dir, DESKTOP_RE, prune=DESKTOP_PRUNE_DIRS)
+        if full_path:
+            logger.debug("Found desktop file: %s", full_path)
+            if return_relative:
+                try:
+                    relative_path = os.path.relpath(full_path, search_dir)
+                    logger.debug("Returning relative path: %s", relative_path)
+                    return relative_path
+                except ValueError as e:
+                    logger.warning(f"Could not get relative path for {full_path} from {search_dir}: {e}")
+                    return None # Fallback if relpath fails
+            logger.debug("Returning full path: %s", full_path)
+            return full_path
+        logger.debug("No desktop file found in %s", search_dir)
         return None
 
     def _check_root_requirement_based_on_paths(self):
@@ -486,36 +1211,44 @@ class AppImageInstaller:
 
     def extract_appimage(self):
         """Performs a full extraction of the AppImage to a temporary directory."""
-        logger.debug(f"Entering extract_appimage for {self.appimage_path}")
+        logger.debug("Entering extract_appimage for %s", self.appimage_path)
         if not self.appimage_path or not os.path.exists(self.appimage_path): 
             logger.error("Cannot extract: AppImage path is invalid.")
             return False
-        if not os.access(self.appimage_path, os.X_OK):
-            try: 
-                os.chmod(self.appimage_path, os.stat(self.appimage_path).st_mode | 0o111)
+        try: 
+            if _make_executable(self.appimage_path):
                 logger.info(f"Made AppImage executable: {self.appimage_path}")
-            except OSError as e:
-                logger.error(f"Failed to make AppImage executable: {e}")
-                return False 
+        except OSError as e:
+            logger.error(f"Failed to make AppImage executable: {e}")
+            return False 
 
         self._ensure_temp_dir()
+        self._unmount_squashfs()
         self.extract_dir = os.path.join(self.temp_dir, "squashfs-root")
         if os.path.exists(self.extract_dir):
             logger.info(f"Removing existing extraction directory: {self.extract_dir}")
             shutil.rmtree(self.extract_dir)
 
+        reused = self._metadata_tree_complete and self._adopt_metadata_tree()
+        if reused:
+            logger.info(f"Reusing the full extraction from read_metadata: {self.extract_dir}")
+        elif self._mount_squashfs():
+            logger.info(f"Mounted {self.appimage_path} read-only at {self.extract_dir} instead of extracting it")
+            reused = True
+        if reused:
+            self._update_metadata_from_desktop_file()
+            self.app_install_dir = self._get_app_specific_install_dir()
+            self._determine_final_paths()
+            return True
+
         logger.info(f"Starting full extraction of {self.appimage_path} to {self.extract_dir}...")
         try:
             extract_command = [self.appimage_path, "--appimage-extract"]
-            logger.debug(f"Running command: {' '.join(extract_command)} in {self.temp_dir}")
-            # Create environment that prevents AppImage from launching GUI
-            extract_env = os.environ.copy()
-            extract_env["APPIMAGE_EXTRACT_AND_RUN"] = "0"
-            extract_env["NO_CLEANUP"] = "1"
-            extract_env.pop("DISPLAY", None)  # Remove DISPLAY to prevent GUI launch
-            extract_env.pop("WAYLAND_DISPLAY", None)  # Also remove Wayland display
-            result = subprocess.run(extract_command, cwd=self.temp_dir, check=True, 
-                                   capture_output=True, text=True, timeout=120, env=extract_env)
+            logger.debug("Running command: %s in %s", ' '.join(extract_command), self.temp_dir)
+            extract_env = _extract_env() # Keeps the AppImage from launching its GUI
+            # stdout only lists the extracted files; don't buffer and decode it
+            result = subprocess.run(extract_command, cwd=self.temp_dir, check=True, stdin=subprocess.DEVNULL,
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, timeout=120, env=extract_env)
             
             if not os.path.isdir(self.extract_dir):
                 logger.error(f"Extraction command succeeded but expected directory '{self.extract_dir}' not found.")
@@ -525,9 +1258,7 @@ class AppImageInstaller:
             logger.debug("Updating metadata and final paths after full extraction...")
             self._update_metadata_from_desktop_file()
             self.app_install_dir = self._get_app_specific_install_dir()
-            self._determine_final_paths()
-            self._determine_final_paths_placeholder()
-            logger.debug(f"Post-extraction Info: Name='{self.app_info.get('name')}', InstallDir='{self.app_install_dir}', BinLink='{self.bin_symlink_target}', FinalExec='{self.final_executable_path}', FinalDesktop='{self.final_desktop_path}'")
+            self._determine_final_paths() # Also sets the bin symlink target and logs the resulting paths
             return True
             
         except Exception as e:
@@ -538,36 +1269,89 @@ class AppImageInstaller:
         # We need a finally block if self.cleanup() is called here, or ensure the except block covers all cases
         # Add a basic except block if try was the only issue
 
+    def _mount_squashfs(self):
+        """Mounts the embedded squashfs image read-only at self.extract_dir with squashfuse.
+        
+        Files are then decompressed on demand, when the install copies them,
+        instead of all up front. Only used for non-root installs: root can't read
+        another user's FUSE mount. Requires squashfuse and a type 2 AppImage.
+        
+        Returns:
+            bool: True if mounted, False if the AppImage has to be extracted
+        """
+        if self.requires_root or not shutil.which("squashfuse"):
+            return False
+        offset = self._squashfs_image_offset()
+        if offset is None:
+            return False
+        try:
+            os.makedirs(self.extract_dir)
+            subprocess.run(["squashfuse", "-o", f"offset={offset}", self.appimage_path, self.extract_dir],
+                           check=True, timeout=30, stdin=subprocess.DEVNULL,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        except (OSError, subprocess.SubprocessError) as e:
+            logger.debug("squashfuse mount failed (%s), extracting instead.", e)
+            try:
+                os.rmdir(self.extract_dir)
+            except OSError:
+                pass
+            return False
+        self._squashfuse_mount = self.extract_dir
+        _fuse_mounts.add(self.extract_dir)
+        return True
+
+    def _unmount_squashfs(self):
+        """Unmounts the squashfuse mount made by _mount_squashfs, if any."""
+        if self._squashfuse_mount:
+            if not _unmount_fuse(self._squashfuse_mount):
+                logger.warning(f"Could not unmount {self._squashfuse_mount}")
+            _fuse_mounts.discard(self._squashfuse_mount)
+            self._squashfuse_mount = None
+
+    def _adopt_metadata_tree(self):
+        """Moves the full extraction done by read_metadata to self.extract_dir.
+        
+        Both live in self.temp_dir, so this is a single rename.
+        
+        Returns:
+            bool: True if the tree was moved, False if it has to be extracted again
+        """
+        source = self.metadata_squashfs_root
+        self._metadata_tree_complete = False # The tree can only be taken over once
+        if not source or not os.path.isdir(source):
+            return False
+        try:
+            os.rename(source, self.extract_dir)
+        except OSError as e:
+            logger.warning(f"Could not reuse metadata extraction {source}: {e}")
+            return False
+        self._icon_resolution_cache.clear()
+        self.metadata_squashfs_root = self.extract_dir
+        return True
+
     def _update_metadata_from_desktop_file(self):
         """Finds and parses the .desktop file within the full extract_dir."""
         if not self.extract_dir or not os.path.isdir(self.extract_dir):
             logger.warning("Cannot update metadata: Extraction directory not found.")
             return 
             
-        found_desktop = None
-        for root, _, files in os.walk(self.extract_dir):
-            for file in files:
-                if file.lower().endswith(".desktop"):
-                    found_desktop = os.path.join(root, file)
-                    logger.debug(f"Found desktop file in full extraction: {found_desktop}")
-                    break # Inner loop
-            if found_desktop: 
-                break # Outer loop
+        found_desktop = find_first_matching(self.extract_dir, DESKTOP_RE, prune=DESKTOP_PRUNE_DIRS)
+        if found_desktop:
+            logger.debug("Found desktop file in full extraction: %s", found_desktop)
 
         if found_desktop:
             self.extracted_desktop_path = found_desktop 
+            self._extracted_desktop_relative = os.path.relpath(found_desktop, self.extract_dir)
             new_metadata = self._parse_desktop_file(found_desktop)
-            logger.debug(f"Updating metadata from fully extracted desktop file. Old: {self.app_info}, New: {new_metadata}")
+            logger.debug("Updating metadata from fully extracted desktop file. Old: %s, New: %s", self.app_info, new_metadata)
             for key, value in new_metadata.items():
                 if value is not None:
                     self.app_info[key] = value
             
             # Ensure name_sanitized is set when name exists
-            if 'name' in self.app_info and 'name_sanitized' not in self.app_info:
-                self.app_info['name_sanitized'] = sanitize_name(self.app_info['name'])
-                logger.debug(f"Added missing name_sanitized: {self.app_info['name_sanitized']}")
+            self._get_sanitized_name()
                 
-            logger.debug(f"Merged metadata: {self.app_info}")
+            logger.debug("Merged metadata: %s", self.app_info)
         else: 
             logger.warning("Could not find .desktop file in the full extraction directory.")
             if not self.app_info.get('name'): 
@@ -575,7 +1359,7 @@ class AppImageInstaller:
     
     def install_files(self):
         """Copies files from the temporary extraction dir to the final install dir (non-root only)."""
-        logger.debug(f"Entering install_files. Source: {self.extract_dir}, Target: {self.app_install_dir}")
+        logger.debug("Entering install_files. Source: %s, Target: %s", self.extract_dir, self.app_install_dir)
         if self.requires_root:
             logger.error("install_files should not be called for root installs (use get_install_commands).")
             return False
@@ -591,14 +1375,21 @@ class AppImageInstaller:
         logger.info(f"Copying files from {source_dir_to_copy} to {target_dir}")
 
         try:
-            os.makedirs(target_dir, exist_ok=True)
-            shutil.copytree(source_dir_to_copy, target_dir, symlinks=True, dirs_exist_ok=True)
+            if self._move_extracted_tree(target_dir):
+                logger.debug("Moved extracted tree into place: %s", target_dir)
+            else:
+                os.makedirs(target_dir, exist_ok=True)
+                # On the same filesystem the extracted files are hardlinked instead of copied,
+                # otherwise the data is copied inside the kernel where possible
+                same_fs = os.stat(source_dir_to_copy).st_dev == os.stat(target_dir).st_dev
+                copy_function = _link_or_copy if same_fs else _fast_copy2
+                logger.debug("Source and target on same filesystem: %s", same_fs)
+                _copy_tree(source_dir_to_copy, target_dir, copy_function=copy_function)
             
             marker_path = os.path.join(target_dir, ".aim_managed")
             try:
-                with open(marker_path, 'w') as f:
-                    f.write(f"Installed by AppImage Manager at {time.time()}\n")
-                logger.debug(f"Created marker file: {marker_path}")
+                _write_marker_file(marker_path, f"Installed by AppImage Manager at {time.time()}\n")
+                logger.debug("Created marker file: %s", marker_path)
             except Exception as marker_e:
                 logger.warning(f"Could not create marker file '{marker_path}': {marker_e}")
 
@@ -609,30 +1400,49 @@ class AppImageInstaller:
         except Exception as e:
             logger.error(f"Failed to copy files to installation directory: {e}", exc_info=True)
             logger.debug("Exiting install_files (failed)")
-            return False 
+            return False
+        finally:
+            # The tree has been copied (or the copy failed): don't keep the AppImage mounted
+            if self._squashfuse_mount:
+                self._unmount_squashfs()
+                self.extract_dir = None 
+
+    def _move_extracted_tree(self, target_dir):
+        """Renames extract_dir to target_dir if that is possible in one step.
+        
+        Only done when target_dir doesn't exist yet (or is empty) and is on the
+        same filesystem. extract_dir is unset afterwards, its files now live in
+        target_dir.
+        
+        Returns:
+            bool: True if the tree was moved, False if it has to be copied
+        """
+        try:
+            if os.path.isdir(target_dir) and _has_more_entries(target_dir, 0):
+                return False
+            if not _same_filesystem(self.extract_dir, target_dir):
+                return False
+            os.makedirs(os.path.dirname(target_dir), exist_ok=True)
+            os.rename(self.extract_dir, target_dir)
+        except OSError as e:
+            logger.debug("Could not move %s to %s (%s), copying instead.", self.extract_dir, target_dir, e)
+            return False
+        self.extract_dir = None
+        return True
 
     def get_installation_info(self):
         """Returns a dictionary with relevant info for database saving."""
-        info = self.app_info.copy()
-        
         # Create a sanitized name if not already present
-        if 'name' in info and 'name_sanitized' not in info:
-            info['name_sanitized'] = sanitize_name(info['name'])
+        self._get_sanitized_name()
+        info = self.app_info.copy()
         
         # Create desktop file path if not set
         desktop_file_path = getattr(self, 'final_copied_desktop_path', None)
         if not desktop_file_path and self.final_desktop_path:
-            # Determine expected desktop filename
-            app_name_sanitized = info.get('name_sanitized')
-            if app_name_sanitized:
-                desktop_filename = f"appimagekit_{app_name_sanitized}.desktop"
-                
-                # For system installations, use standard XDG path
-                if self.install_mode == "system":
-                    desktop_file_path = os.path.join(self.desktop_link_dir, desktop_filename)
-                # For user installations, use user XDG path
-                else:
-                    desktop_file_path = os.path.join(self.desktop_link_dir, desktop_filename)
+            # Expected desktop filename, the one get_install_commands links to (cached per app name).
+            # desktop_link_dir already is the system or user XDG path for the install mode.
+            if info.get('name_sanitized'):
+                desktop_file_path = os.path.join(self.desktop_link_dir, self._get_desktop_link_filename())
             else:
                 logger.warning("Cannot determine desktop file path: missing name_sanitized")
         
@@ -653,43 +1463,104 @@ class AppImageInstaller:
         return info
 
     def _ensure_temp_dir(self):
-        """Ensures the temporary directory exists."""
+        """Ensures the temporary directory exists.
+        
+        Uses a tmpfs (/dev/shm) when _pick_tmpfs_dir allows it, so extracted files
+        never hit the disk.
+        """
         if not self.temp_dir:
-            self.temp_dir = tempfile.mkdtemp(prefix="aim_")
-            logger.debug(f"Created temporary directory: {self.temp_dir}")
-            self.temp_files.append(self.temp_dir) 
+            tmpfs_dir = self._pick_tmpfs_dir()
+            if tmpfs_dir:
+                # The pid in the name lets _remove_stale_tmpfs_dirs tell abandoned dirs apart
+                self.temp_dir = tempfile.mkdtemp(prefix=f"{TMPFS_PREFIX}{os.getpid()}_", dir=tmpfs_dir)
+                # Don't leave extracted files in RAM if cleanup() is never reached
+                _tmpfs_temp_dirs.add(self.temp_dir)
+            else:
+                self.temp_dir = tempfile.mkdtemp(prefix="aim_")
+            logger.debug("Created temporary directory: %s", self.temp_dir)
+            self.temp_files[self.temp_dir] = "dir"
+
+    def _is_type1_appimage(self):
+        """Checks whether the AppImage is a legacy type 1 (ISO 9660) image.
+        
+        Type 1 runtimes ignore the pattern of --appimage-extract=<pattern> and
+        always extract everything.
+        """
+        if self._appimage_type is None:
+            self._appimage_type = _get_appimage_type(self.appimage_path) or 0
+        return self._appimage_type == 1
+
+    def _squashfs_image_offset(self):
+        """Returns the (cached) offset of the embedded squashfs image, or None if there is none."""
+        if self._squashfs_offset == -1:
+            self._squashfs_offset = _get_squashfs_offset(self.appimage_path)
+        return self._squashfs_offset
+
+    def _pick_tmpfs_dir(self):
+        """Returns TMPFS_DIR if the extracted AppImage should go to RAM, else None.
+        
+        Only chosen when the regular temp dir is on another filesystem than the
+        install prefix anyway: otherwise the extracted tree is renamed or
+        hardlinked into place (_move_extracted_tree, _link_or_copy), which a
+        tmpfs would rule out. Needs room for the extraction in TMPFS_DIR.
+        """
+        if self.base_install_prefix and _same_filesystem(tempfile.gettempdir(), self.base_install_prefix):
+            return None
+        try:
+            appimage_size = os.path.getsize(self.appimage_path)
+        except OSError:
+            return None
+        _remove_stale_tmpfs_dirs() # Leftovers of crashed runs would otherwise stay in RAM until reboot
+        if self._tmpfs_has_room(TMPFS_DIR, appimage_size * TMPFS_SIZE_FACTOR):
+            return TMPFS_DIR
+        return None
+
+    def _tmpfs_has_room(self, directory, required_bytes):
+        """Checks whether directory is writable, not noexec, and has required_bytes free."""
+        try:
+            if not os.access(directory, os.W_OK):
+                return False
+            st = os.statvfs(directory)
+            if st.f_flag & os.ST_NOEXEC:
+                # Executable checks on extracted files would fail on a noexec mount
+                return False
+            return st.f_bavail * st.f_frsize >= required_bytes
+        except OSError:
+            return False
             
     def cleanup(self):
         """Removes temporary files and directories created by this instance."""
-        logger.debug(f"Starting cleanup for installer instance (Temp files/dirs: {len(self.temp_files)} items)")
-        files_to_remove = [f for f in self.temp_files if os.path.isfile(f) or os.path.islink(f)]
-        for f_path in files_to_remove:
+        logger.debug("Starting cleanup for installer instance (Temp files/dirs: %s items)", len(self.temp_files))
+        _join_rmtree_threads() # Background deletions may still be running inside temp_dir
+        self._unmount_squashfs()
+        # Anything inside a registered directory goes away with it and isn't removed separately
+        temp_dirs = [path for path, kind in self.temp_files.items() if kind == "dir"]
+        for path, kind in reversed(self.temp_files.items()):
+            if any(path.startswith(d_path + os.sep) for d_path in temp_dirs):
+                continue
+            if kind == "dir":
+                _rmtree(path)
+                logger.debug("Removed temp directory: %s", path)
+                continue
             try:
-                os.remove(f_path)
-                logger.debug(f"Removed temp file: {f_path}")
+                os.remove(path)
+                logger.debug("Removed temp file: %s", path)
+            except FileNotFoundError:
+                pass
             except OSError as e:
-                logger.warning(f"Could not remove temp file {f_path}: {e}")
-                 
-        dirs_to_remove = [d for d in self.temp_files if os.path.isdir(d)]
-        for d_path in reversed(dirs_to_remove): 
-            try:
-                if os.path.exists(d_path): 
-                    shutil.rmtree(d_path)
-                    logger.debug(f"Removed temp directory: {d_path}")
-                else: 
-                    logger.debug(f"Temp directory already removed: {d_path}")
-            except OSError as e: 
-                logger.warning(f"Could not remove temp directory {d_path}: {e}")
+                logger.warning(f"Could not remove temp file {path}: {e}")
                  
-        self.temp_files = [] 
+        self.temp_files = {} 
+        _tmpfs_temp_dirs.discard(self.temp_dir)
         self.temp_dir = None
         self.extract_dir = None 
         self.temp_preview_icon_path = None 
+        self._icon_resolution_cache.clear()
         logger.debug("Cleanup finished.")
 
     def create_symlinks(self):
         """Creates desktop integration (symlinks, desktop file, icons) for non-root installs."""
-        logger.debug(f"Entering create_symlinks. Bin Target: {self.bin_symlink_target}, Desktop Target Dir: {self.desktop_link_dir}")
+        logger.debug("Entering create_symlinks. Bin Target: %s, Desktop Target Dir: %s", self.bin_symlink_target, self.desktop_link_dir)
         if self.requires_root:
             logger.error("create_symlinks called for a root-requiring installation. Integration skipped.")
             return False
@@ -707,7 +1578,7 @@ class AppImageInstaller:
         success = True
 
         try:
-            logger.debug(f"Ensuring integration target directories exist: {self.bin_link_dir}, {self.desktop_link_dir}")
+            logger.debug("Ensuring integration target directories exist: %s, %s", self.bin_link_dir, self.desktop_link_dir)
             os.makedirs(self.bin_link_dir, exist_ok=True)
             os.makedirs(self.desktop_link_dir, exist_ok=True)
             logger.debug("Target directories ensured/created.")
@@ -720,16 +1591,13 @@ class AppImageInstaller:
             self.app_install_dir, 
             self.app_info 
         )
-        logger.debug(f"Icon copy result (icon_for_desktop): {icon_for_desktop}")
+        logger.debug("Icon copy result (icon_for_desktop): %s", icon_for_desktop)
 
         link_name = self.bin_symlink_target
         link_target = self.final_executable_path
         try:
-            if os.path.lexists(link_name):
-                logger.debug(f"Removing existing symlink: {link_name}")
-                os.remove(link_name)
-            logger.debug(f"Creating executable symlink: {link_name} -> {link_target}")
-            os.symlink(link_target, link_name)
+            logger.debug("Creating executable symlink: %s -> %s", link_name, link_target)
+            _replace_symlink(link_target, link_name)
             self.symlinks_created.append(link_name) 
             logger.info(f"Executable symlink created: {link_name} -> {link_target}")
         except (OSError, PermissionError) as e:
@@ -737,7 +1605,7 @@ class AppImageInstaller:
             success = False 
 
         if success:
-            logger.debug(f"Calling create_desktop_entry: final_path={self.final_desktop_path}, target_dir={self.desktop_link_dir}, bin_target={self.bin_symlink_target}, icon={icon_for_desktop}")
+            logger.debug("Calling create_desktop_entry: final_path=%s, target_dir=%s, bin_target=%s, icon=%s", self.final_desktop_path, self.desktop_link_dir, self.bin_symlink_target, icon_for_desktop)
             created_desktop_path_result = integration.create_desktop_entry(
                 self.final_desktop_path, 
                 self.desktop_link_dir, 
@@ -745,7 +1613,7 @@ class AppImageInstaller:
                 icon_for_desktop,
                 install_dir=self.app_install_dir  # For Qt detection
             )
-            logger.debug(f"create_desktop_entry result: {created_desktop_path_result}")
+            logger.debug("create_desktop_entry result: %s", created_desktop_path_result)
             
             if created_desktop_path_result:
                 self.final_copied_desktop_path = created_desktop_path_result 
@@ -755,11 +1623,19 @@ class AppImageInstaller:
         else:
             logger.warning("Skipping desktop file creation due to previous symlink failure.")
             
-        logger.debug(f"Exiting create_symlinks (success={success})")
+        logger.debug("Exiting create_symlinks (success=%s)", success)
         return success
 
     def get_install_commands(self):
-        """Generates shell commands needed for root installation (rsync, mkdir, ln)."""
+        """Generates the shell command needed for root installation (rsync, mkdir, ln).
+        
+        All steps are joined into one `bash -c` script (with `set -e`), so the caller
+        only needs a single privileged invocation instead of one per step. Every
+        interpolated path goes through shlex.quote: the script runs as root.
+        
+        Returns:
+            list: A single command string, or an empty list if no commands could be generated
+        """
         if not self.requires_root:
             logger.debug("get_install_commands called for non-root install, returning empty list.")
             return [] 
@@ -793,7 +1669,7 @@ class AppImageInstaller:
         # Calculate the final executable path WITHIN the target directory
         # This path might not exist *yet*, but the command assumes it will after rsync
         calculated_final_exec_path = os.path.join(self.app_install_dir, relative_exec)
-        logger.debug(f"Calculated final executable path for command: {calculated_final_exec_path}")
+        logger.debug("Calculated final executable path for command: %s", calculated_final_exec_path)
 
         # --->>> Check extract_dir (still needed for rsync source) <<<---
         if not self.extract_dir or not os.path.isdir(self.extract_dir):
@@ -801,121 +1677,170 @@ class AppImageInstaller:
             return []
 
         # --- Generate Commands (Restored Original Logic) --- 
+        # Every directory the steps need is created by one mkdir at the start of the script
+        mkdir_dirs = []
         base_dir_for_mkdir = os.path.dirname(self.app_install_dir.rstrip('/'))
         if base_dir_for_mkdir: 
-            commands.append(f"mkdir -p \"{base_dir_for_mkdir}\"")
+            mkdir_dirs.append(base_dir_for_mkdir)
              
         source_dir = self.extract_dir
         if not source_dir.endswith('/'): source_dir += '/' 
         target_dir = self.app_install_dir
-        commands.append(f"rsync -ah --exclude='.union' \"{source_dir}\" \"{target_dir}\"")
+        # Over an existing install, in-place writes would hit binaries a running instance has mapped
+        fresh_target = not os.path.lexists(target_dir)
+        if fresh_target and _same_filesystem(self.extract_dir, target_dir):
+            # Reflinks (btrfs, XFS) share the extracted data blocks instead of copying them
+            commands.append(f"cp -a --reflink=auto {shlex.quote(source_dir + '.')} {shlex.quote(target_dir)}")
+            commands.append(f"rm -rf {shlex.quote(os.path.join(target_dir, '.union'))}")
+        else:
+            # Nothing to delta against on a fresh local copy: skip checksums and compression
+            rsync_cmd = "rsync -a --info=progress0 --whole-file --no-compress --exclude='.union'"
+            if fresh_target:
+                # No temp file + rename needed when nothing can be running from the target yet
+                rsync_cmd += " --inplace"
+            if _has_more_entries(self.extract_dir, PARALLEL_RSYNC_MIN_ENTRIES):
+                # Large trees: copy the second-level directories in parallel first; the
+                # final pass then only fills in what's left (top-level files, dir modes)
+                workers = os.cpu_count() or 1
+                mkdir_dirs.append(target_dir)
+                commands.append(f"(cd {shlex.quote(source_dir)} && find . -mindepth 2 -maxdepth 2 -type d ! -path './.union/*' -print0"
+                                f" | xargs -0 -r -P{workers} -I{{}} {rsync_cmd} --relative {{}} {shlex.quote(target_dir + '/')})")
+            commands.append(f"{rsync_cmd} {shlex.quote(source_dir)} {shlex.quote(target_dir)}")
         
-        marker_path = os.path.join(target_dir, ".aim_managed")
-        marker_content = f"Installed by AppImage Manager (root) at {time.time()}"
-        escaped_content = marker_content.replace('"', '\\"')
-        commands.append(f'echo "{escaped_content}" > "{marker_path}"')
+        # The marker is put into the source tree so the copy above brings it along
+        marker_content = f"Installed by AppImage Manager (root) at {time.time()}\n"
+        try:
+            _write_marker_file(os.path.join(self.extract_dir, ".aim_managed"), marker_content)
+        except OSError as e:
+            logger.warning(f"Could not pre-create marker file in {self.extract_dir} ({e}), writing it from the script.")
+            marker_path = os.path.join(target_dir, ".aim_managed")
+            commands.append(f"printf %s {shlex.quote(marker_content)} > {shlex.quote(marker_path)}")
 
         bin_link_parent = os.path.dirname(self.bin_symlink_target.rstrip('/'))
         if bin_link_parent:
-            commands.append(f"mkdir -p \"{bin_link_parent}\"")
+            mkdir_dirs.append(bin_link_parent)
 
         # --->>> Link for Executable <<<---
-        commands.append(f"rm -f \"{self.bin_symlink_target}\"") 
-        commands.append(f"ln -s \"{calculated_final_exec_path}\" \"{self.bin_symlink_target}\"")
+        commands.append(f"ln -sfT {shlex.quote(calculated_final_exec_path)} {shlex.quote(self.bin_symlink_target)}")
 
         # --->>> Link for Desktop File <<<---
         if self.final_desktop_path and self.desktop_link_dir:
-             app_name = self.app_info.get('name') or os.path.basename(self.appimage_path).replace('.AppImage','').replace('.appimage','')
-             sanitized_app_name = sanitize_name(app_name)
-             if sanitized_app_name:
-                 desktop_filename = f"appimagekit_{sanitized_app_name}.desktop"
+             desktop_filename = self._get_desktop_link_filename()
+             if desktop_filename:
                  target_desktop_link_path = os.path.join(self.desktop_link_dir, desktop_filename)
                  desktop_link_parent = os.path.dirname(target_desktop_link_path.rstrip('/'))
                  if desktop_link_parent:
-                     commands.append(f"mkdir -p \"{desktop_link_parent}\"")
-                 commands.append(f"rm -f \"{target_desktop_link_path}\"")
-                 commands.append(f"ln -s \"{self.final_desktop_path}\" \"{target_desktop_link_path}\"")
+                     mkdir_dirs.append(desktop_link_parent)
+                 commands.append(f"ln -sfT {shlex.quote(self.final_desktop_path)} {shlex.quote(target_desktop_link_path)}")
                  self.final_copied_desktop_path = target_desktop_link_path 
              else:
                  logger.warning("Could not generate sanitized name for desktop file link command.")
         else:
             logger.warning("Skipping desktop file link command generation: Missing final_desktop_path or desktop_link_dir.")
 
-        logger.debug(f"Generated root commands: {commands}")
-        return commands
+        if mkdir_dirs:
+            commands.insert(0, "mkdir -p " + " ".join(shlex.quote(d) for d in dict.fromkeys(mkdir_dirs)))
+        logger.debug("Generated root commands: %s", commands)
+        script = "set -e\n" + "\n".join(commands)
+        return ["bash -c " + shlex.quote(script)]
 
     def read_metadata(self):
         """Reads metadata (desktop file, icon) from the AppImage, attempting efficient extraction first."""
-        logger.debug(f"Entering read_metadata for {self.appimage_path}")
+        logger.debug("Entering read_metadata for %s", self.appimage_path)
         logger.info(f"Reading metadata for {self.appimage_path}")
         self.app_info = {}
         self.extracted_desktop_path = None
         self.temp_preview_icon_path = None 
+        self._metadata_tree_complete = False
 
-        if not os.access(self.appimage_path, os.X_OK):
-            try:
-                os.chmod(self.appimage_path, os.stat(self.appimage_path).st_mode | 0o111)
+        try:
+            if _make_executable(self.appimage_path):
                 logger.info(f"Made AppImage executable: {self.appimage_path}")
-            except OSError as e:
-                logger.error(f"Failed to make AppImage executable for metadata read: {e}")
-                self._populate_fallback_metadata()
-                self.app_install_dir = self._get_app_specific_install_dir()
-                self._determine_final_paths_placeholder()
-                return False, None 
+        except OSError as e:
+            logger.error(f"Failed to make AppImage executable for metadata read: {e}")
+            self._populate_fallback_metadata()
+            self._recompute_paths()
+            return False, None 
                 
         self._ensure_temp_dir()
         meta_extract_dir = os.path.join(self.temp_dir, "meta_read")
-        if os.path.exists(meta_extract_dir): shutil.rmtree(meta_extract_dir)
+        if os.path.exists(meta_extract_dir): _async_rmtree(meta_extract_dir)
+        self._icon_resolution_cache.clear() # The tree is about to be extracted again
         os.makedirs(meta_extract_dir)
-        self.temp_files.append(meta_extract_dir) 
+        self.temp_files[meta_extract_dir] = "dir"
         
         squashfs_root = os.path.join(meta_extract_dir, "squashfs-root")
         found_desktop_file = None
         extraction_error = None
+        dir_listings = {} # Shared by the .desktop and icon searches of squashfs_root
         
-        # Create environment that prevents AppImage from launching GUI
-        extract_env = os.environ.copy()
-        extract_env["APPIMAGE_EXTRACT_AND_RUN"] = "0"
-        extract_env["NO_CLEANUP"] = "1"
-        extract_env.pop("DISPLAY", None)  # Remove DISPLAY to prevent GUI launch
-        extract_env.pop("WAYLAND_DISPLAY", None)  # Also remove Wayland display
+        extract_env = _extract_env() # Keeps the AppImage from launching its GUI
         
         try:
-            logger.debug("Attempting selective desktop file extraction...")
-            selective_extract_command = [self.appimage_path, f"--appimage-extract=*.desktop"]
-            
-            # Use non-blocking extraction to keep UI responsive
-            return_code, stdout, stderr = _run_subprocess_non_blocking(
-                selective_extract_command, 
-                cwd=meta_extract_dir, 
-                timeout=60,  # 60 seconds for selective extraction
-                env=extract_env
-            )
-            
-            if return_code is None:
-                # Timeout or error
-                logger.warning(f"Selective desktop extraction failed: {stderr}")
+            # Preferred: read the files in-process, no AppImage runtime involved
+            found_desktop_file = self._read_metadata_from_squashfs(squashfs_root)
+            if found_desktop_file:
+                self.extracted_desktop_path = found_desktop_file
+            elif self._is_type1_appimage():
+                logger.debug("Type 1 AppImage, skipping selective extraction (it would extract everything).")
             else:
-                logger.debug(f"Selective extract result code: {return_code}")
-                if return_code == 0 and os.path.isdir(squashfs_root):
-                    logger.debug("Selective desktop file extraction command succeeded.")
-                    for root, _, files in os.walk(squashfs_root):
-                        for file in files: 
-                            if file.lower().endswith(".desktop"):
-                                found_desktop_file = os.path.join(root, file)
-                                logger.debug(f"Found desktop file via selective extract: {found_desktop_file}")
-                                self.extracted_desktop_path = found_desktop_file
-                                break # Inner loop
-                        if found_desktop_file: break # Outer loop
-                    if not found_desktop_file:
-                        logger.warning("Selective extract command ok, but no .desktop file found inside.")
+                # Deprecated: spawning the AppImage is only kept as a fallback
+                logger.debug("Attempting selective desktop file and icon extraction...")
+                # The runtime honours a single --appimage-extract=<pattern> per run, so
+                # the .desktop file and the icon are extracted one pattern at a time; the
+                # preview icon then doesn't need a full extraction. Icon patterns are only
+                # tried once the .desktop pattern worked, and only until one yields an icon.
+                desktop_pattern, *icon_patterns = METADATA_EXTRACT_PATTERNS
+                deadline = time.monotonic() + 60 # 60 seconds for the whole selective extraction
+                # Use non-blocking extraction to keep UI responsive
+                return_code, stdout, stderr = _run_subprocess_non_blocking(
+                    [self.appimage_path, f"--appimage-extract={desktop_pattern}"],
+                    cwd=meta_extract_dir, 
+                    timeout=60,
+                    env=extract_env,
+                    capture_stdout=False  # Only the list of extracted files
+                )
+                for pattern in icon_patterns if return_code == 0 else ():
+                    icon_return_code, _, icon_stderr = _run_subprocess_non_blocking(
+                        [self.appimage_path, f"--appimage-extract={pattern}"],
+                        cwd=meta_extract_dir,
+                        timeout=max(deadline - time.monotonic(), 1),
+                        env=extract_env,
+                        capture_stdout=False
+                    )
+                    if icon_return_code != 0:
+                        logger.debug("Extracting %s failed (%s), continuing without it.", pattern, icon_stderr)
+                    elif _icon_pattern_extracted(squashfs_root, pattern):
+                        break
+                
+                if return_code is None:
+                    # Timeout or error
+                    logger.warning(f"Selective desktop extraction failed: {stderr}")
                 else:
-                    stderr_out = stderr.strip() if stderr else "(no stderr)"
-                    logger.warning(f"Selective desktop extraction failed (Code: {return_code}). Stderr: {stderr_out}")
+                    logger.debug("Selective extract result code: %s", return_code)
+                    if return_code == 0 and os.path.isdir(squashfs_root):
+                        logger.debug("Selective desktop file extraction command succeeded.")
+                        found_desktop_file = find_first_matching(squashfs_root, DESKTOP_RE, prune=DESKTOP_PRUNE_DIRS,
+                                                                  listings=dir_listings)
+                        if found_desktop_file:
+                            logger.debug("Found desktop file via selective extract: %s", found_desktop_file)
+                            self.extracted_desktop_path = found_desktop_file
+                        else:
+                            logger.warning("Selective extract command ok, but no .desktop file found inside.")
+                    else:
+                        stderr_out = stderr.strip() if stderr else "(no stderr)"
+                        logger.warning(f"Selective desktop extraction failed (Code: {return_code}). Stderr: {stderr_out}")
             
             if not found_desktop_file:
                 logger.info("Selective desktop extraction insufficient, attempting full extract for metadata...")
-                if os.path.exists(squashfs_root): shutil.rmtree(squashfs_root) 
+                if os.path.exists(squashfs_root):
+                    # Extract into a fresh directory instead of deleting the partial
+                    # tree first; both are removed with the other temp files
+                    meta_extract_dir = os.path.join(self.temp_dir, f"meta_read_{_unique_suffix()}")
+                    os.makedirs(meta_extract_dir)
+                    self.temp_files[meta_extract_dir] = "dir"
+                    squashfs_root = os.path.join(meta_extract_dir, "squashfs-root")
+                dir_listings.clear()
                 
                 full_extract_command = [self.appimage_path, "--appimage-extract"]
                 
@@ -924,7 +1849,8 @@ class AppImageInstaller:
                     full_extract_command, 
                     cwd=meta_extract_dir, 
                     timeout=300,  # 5 minutes for full extraction of large AppImages
-                    env=extract_env
+                    env=extract_env,
+                    capture_stdout=False
                 )
                 
                 if return_code_full is None:
@@ -932,15 +1858,13 @@ class AppImageInstaller:
                     logger.error(extraction_error)
                 elif return_code_full == 0 and os.path.isdir(squashfs_root):
                     logger.info("Full extract for metadata successful.")
-                    for root, _, files in os.walk(squashfs_root):
-                        for file in files: 
-                            if file.lower().endswith(".desktop"):
-                                found_desktop_file = os.path.join(root, file)
-                                logger.debug(f"Found desktop file via full extract: {found_desktop_file}")
-                                self.extracted_desktop_path = found_desktop_file
-                                break # Inner loop
-                        if found_desktop_file: break # Outer loop
-                    if not found_desktop_file:
+                    self._metadata_tree_complete = True # extract_appimage can take this tree over
+                    found_desktop_file = find_first_matching(squashfs_root, DESKTOP_RE, prune=DESKTOP_PRUNE_DIRS,
+                                                              listings=dir_listings)
+                    if found_desktop_file:
+                        logger.debug("Found desktop file via full extract: %s", found_desktop_file)
+                        self.extracted_desktop_path = found_desktop_file
+                    else:
                         logger.warning("Full extract ok, but still no .desktop file found inside.")
                 else: 
                     stderr_output = stderr_full.strip() if stderr_full else "(no stderr)"
@@ -952,99 +1876,17 @@ class AppImageInstaller:
             error_msg = f"Error during metadata extraction process: {e}"
             logger.error(error_msg, exc_info=True)
             extraction_error = error_msg
+        self.metadata_squashfs_root = squashfs_root
              
-        if found_desktop_file and os.path.isfile(found_desktop_file):
-            parsed_info = self._parse_desktop_file(found_desktop_file)
+        # No isfile() first: _parse_desktop_file stats the file anyway, and one that
+        # vanished or can't be read comes back without any values
+        parsed_info = self._parse_desktop_file(found_desktop_file) if found_desktop_file else None
+        if parsed_info and any(parsed_info.values()):
             self.app_info.update(parsed_info)
             logger.info(f"Successfully parsed metadata from extracted desktop file: {found_desktop_file}")
 
             icon_name = self.app_info.get("icon_name")
-            found_icon_source_path = None
-
-            # Check .DirIcon first (can be a file or symlink)
-            potential_dir_icon = os.path.join(squashfs_root, ".DirIcon")
-            if os.path.exists(potential_dir_icon):
-                # Handle symlink - follow it to get the actual icon
-                if os.path.islink(potential_dir_icon):
-                    link_target = os.readlink(potential_dir_icon)
-                    if not os.path.isabs(link_target):
-                        link_target = os.path.join(squashfs_root, link_target)
-                    if os.path.isfile(link_target):
-                        found_icon_source_path = link_target
-                        logger.debug(f"Found preview icon source: .DirIcon symlink -> {found_icon_source_path}")
-                elif os.path.isfile(potential_dir_icon):
-                    found_icon_source_path = potential_dir_icon
-                    logger.debug(f"Found preview icon source: .DirIcon at {found_icon_source_path}")
-
-            if not found_icon_source_path and icon_name:
-                logger.debug(f"Searching for preview icon source matching name '{icon_name}' in {squashfs_root}")
-                icon_exts = ['.png', '.svg', '.svgz', '.xpm', '.ico']
-                # Extended search paths for icon locations
-                common_dirs = [
-                    "",  # Root of squashfs
-                    # Standard XDG hicolor icon directories (256, 128, 64, 48, 32, scalable)
-                    "usr/share/icons/hicolor/256x256/apps",
-                    "usr/share/icons/hicolor/128x128/apps", 
-                    "usr/share/icons/hicolor/64x64/apps",
-                    "usr/share/icons/hicolor/48x48/apps",
-                    "usr/share/icons/hicolor/32x32/apps",
-                    "usr/share/icons/hicolor/scalable/apps",
-                    "share/icons/hicolor/256x256/apps",
-                    "share/icons/hicolor/128x128/apps",
-                    "share/icons/hicolor/64x64/apps",
-                    "share/icons/hicolor/48x48/apps",
-                    "share/icons/hicolor/32x32/apps",
-                    "share/icons/hicolor/scalable/apps",
-                    # Pixmaps directories
-                    "usr/share/pixmaps",
-                    "share/pixmaps",
-                    # Some apps use these non-standard locations
-                    "usr/share/icons",
-                    "share/icons",
-                    "resources",
-                    "assets",
-                    "icons",
-                ]
-                
-                # First check if icon_name is a path
-                if '/' in icon_name:
-                    potential_rel_path = os.path.join(squashfs_root, icon_name)
-                    if os.path.isfile(potential_rel_path):
-                        found_icon_source_path = potential_rel_path
-
-                # Search in common directories
-                if not found_icon_source_path:
-                    for cdir in common_dirs:
-                        # Try exact icon name match first
-                        potential_base_path = os.path.join(squashfs_root, cdir, icon_name)
-                        if os.path.isfile(potential_base_path):
-                            found_icon_source_path = potential_base_path
-                            break 
-                        # Try with extensions
-                        for ext in icon_exts:
-                            potential_path = os.path.join(squashfs_root, cdir, f"{icon_name}{ext}")
-                            if os.path.isfile(potential_path):
-                                found_icon_source_path = potential_path
-                                break 
-                        if found_icon_source_path: 
-                            break
-                
-                # Fallback: recursive search for icon file if not found
-                if not found_icon_source_path:
-                    logger.debug(f"Icon not found in common locations, attempting recursive search...")
-                    for root, dirs, files in os.walk(squashfs_root):
-                        for file in files:
-                            file_lower = file.lower()
-                            # Match icon name (with or without extension)
-                            if file_lower.startswith(icon_name.lower()) and any(file_lower.endswith(ext) for ext in icon_exts):
-                                found_icon_source_path = os.path.join(root, file)
-                                logger.debug(f"Found icon via recursive search: {found_icon_source_path}")
-                                break
-                        if found_icon_source_path:
-                            break
-
-                if found_icon_source_path:
-                    logger.debug(f"Found preview icon source by name: {found_icon_source_path}")
+            found_icon_source_path = self._resolve_icon(squashfs_root, icon_name, dir_listings)
 
             if found_icon_source_path:
                 self._ensure_temp_dir() 
@@ -1053,20 +1895,20 @@ class AppImageInstaller:
                     original_ext = os.path.splitext(found_icon_source_path)[1].lower()
                     # --->>> Handle .DirIcon or missing extension <<<---
                     if not original_ext or found_icon_source_path.endswith('.DirIcon'):
-                        logger.debug(f"Source icon '{os.path.basename(found_icon_source_path)}' has no/unconventional extension. Assuming PNG for temp copy.")
+                        logger.debug("Source icon '%s' has no/unconventional extension. Assuming PNG for temp copy.", os.path.basename(found_icon_source_path))
                         original_ext = ".png" # Assume PNG
                         
                     temp_icon_path_target = os.path.join(
                         self.temp_dir, 
-                        f"preview_{uuid.uuid4().hex}{original_ext}"
+                        f"preview_{_unique_suffix()}{original_ext}"
                     )
                     
                     # Log the source and final target path
-                    logger.debug(f"Preview Icon: Source='{found_icon_source_path}', Target='{temp_icon_path_target}'")
+                    logger.debug("Preview Icon: Source='%s', Target='%s'", found_icon_source_path, temp_icon_path_target)
                     
-                    shutil.copy2(found_icon_source_path, temp_icon_path_target)
+                    _fast_copy(found_icon_source_path, temp_icon_path_target)
                     self.temp_preview_icon_path = temp_icon_path_target 
-                    self.temp_files.append(self.temp_preview_icon_path) 
+                    self.temp_files[self.temp_preview_icon_path] = "file"
                     logger.info(f"Copied preview icon to temporary path: {self.temp_preview_icon_path}")
                 except Exception as e:
                     logger.error(f"Failed to copy preview icon {found_icon_source_path} to temp dir: {e}")
@@ -1075,30 +1917,234 @@ class AppImageInstaller:
                 logger.info(f"No suitable preview icon source found within {squashfs_root} for icon name '{icon_name}'.")
 
             logger.debug("Recalculating paths after successful metadata read...")
-            self.app_install_dir = self._get_app_specific_install_dir()
-            self._determine_final_paths_placeholder() 
-            logger.debug(f"Updated Info: Name='{self.app_info.get('name')}', InstallDir='{self.app_install_dir}', BinLink='{self.bin_symlink_target}'")
-            logger.debug(f"Final read metadata: {self.app_info}")
+            self._recompute_paths()
+            logger.debug("Updated Info: Name='%s', InstallDir='%s', BinLink='%s'", self.app_info.get('name'), self.app_install_dir, self.bin_symlink_target)
+            logger.debug("Final read metadata: %s", self.app_info)
             extracted_icon_path = self.temp_preview_icon_path if self.temp_preview_icon_path else None
-            logger.debug(f"read_metadata finished. Success: True. Icon path: {extracted_icon_path}")
+            logger.debug("read_metadata finished. Success: True. Icon path: %s", extracted_icon_path)
             return True, extracted_icon_path
 
         else: 
             logger.warning(f"Could not find or extract .desktop file (Error: {extraction_error}). Using fallback metadata.")
             self._populate_fallback_metadata()
             logger.debug("Recalculating paths using fallback metadata...")
-            self.app_install_dir = self._get_app_specific_install_dir()
-            self._determine_final_paths_placeholder()
-            logger.debug(f"Fallback Info: Name='{self.app_info.get('name')}', InstallDir='{self.app_install_dir}', BinLink='{self.bin_symlink_target}'")
+            self._recompute_paths()
+            logger.debug("Fallback Info: Name='%s', InstallDir='%s', BinLink='%s'", self.app_info.get('name'), self.app_install_dir, self.bin_symlink_target)
             logger.debug("Exiting read_metadata (failed)")
             extracted_icon_path = None
             return False, extracted_icon_path
         
+    def _resolve_icon(self, squashfs_root, icon_name, listings=None):
+        """Finds the icon file for icon_name in an extracted tree.
+        
+        Results, including misses, are memoized per (squashfs_root, icon_name)
+        until the tree is extracted again. Directory listings already read by the
+        .desktop search can be passed in listings (see list_dir).
+        
+        Returns:
+            str or None: Path of the icon file, or None if none was found
+        """
+        key = (squashfs_root, icon_name)
+        if key in self._icon_resolution_cache:
+            return self._icon_resolution_cache[key]
+        found_icon_source_path = None
+
+        # Check .DirIcon first (can be a file or symlink). When it resolves, the
+        # icon_name search below is skipped entirely.
+        potential_dir_icon = os.path.join(squashfs_root, ".DirIcon")
+        root_listing = (listings or {}).get(squashfs_root)
+        # A root listing from the .desktop search tells whether .DirIcon exists without a stat
+        if root_listing is None or any(name == ".DirIcon" for name, _, _ in root_listing):
+            # One lstat tells link, regular file or missing apart
+            try:
+                dir_icon_mode = os.lstat(potential_dir_icon).st_mode
+            except OSError:
+                dir_icon_mode = 0
+            if stat.S_ISLNK(dir_icon_mode):
+                link_target = _dir_icon_sibling(squashfs_root, potential_dir_icon)
+                if link_target is None:
+                    # Follow the link chain, but never outside the extracted tree
+                    link_target = os.path.realpath(potential_dir_icon)
+                    if not (link_target.startswith(os.path.realpath(squashfs_root) + os.sep) and os.path.isfile(link_target)):
+                        link_target = None
+                if link_target:
+                    found_icon_source_path = link_target
+                    logger.debug("Found preview icon source: .DirIcon symlink -> %s", found_icon_source_path)
+            elif stat.S_ISREG(dir_icon_mode):
+                found_icon_source_path = potential_dir_icon
+                logger.debug("Found preview icon source: .DirIcon at %s", found_icon_source_path)
+
+        if not found_icon_source_path and icon_name:
+            logger.debug("Searching for preview icon source matching name '%s' in %s", icon_name, squashfs_root)
+            
+            # First check if icon_name is a path
+            if '/' in icon_name:
+                potential_rel_path = os.path.join(squashfs_root, icon_name)
+                if os.path.isfile(potential_rel_path):
+                    found_icon_source_path = potential_rel_path
+
+            # The common directories first, one (shared) listing each; the whole
+            # tree is only walked when none of them has the icon
+            if not found_icon_source_path:
+                for cdir in ICON_SEARCH_DIRS:
+                    entries = list_dir(os.path.join(squashfs_root, cdir) if cdir else squashfs_root, listings)
+                    found_icon_source_path = _pick_icon(_icon_candidates(entries, icon_name), icon_name)
+                    if found_icon_source_path:
+                        break
+            
+                # Fallback: any icon file starting with the icon name
+                if not found_icon_source_path:
+                    logger.debug("Icon not found in common locations, searching recursively...")
+                    icon_file_re = re.compile(rf"(?={re.escape(icon_name)}).+\.(?:{'|'.join(ICON_EXTS)})$", re.I)
+                    found_icon_source_path = find_first_matching(squashfs_root, icon_file_re, listings=listings)
+                    if found_icon_source_path:
+                        logger.debug("Found icon via recursive search: %s", found_icon_source_path)
+
+            if found_icon_source_path:
+                logger.debug("Found preview icon source by name: %s", found_icon_source_path)
+
+        self._icon_resolution_cache[key] = found_icon_source_path
+        return found_icon_source_path
+
+    def _read_metadata_from_squashfs(self, squashfs_root):
+        """Reads the .desktop file and icon directly from the embedded squashfs image.
+        
+        Requires the optional PySquashfsImage package. The files are written to the
+        same layout as a selective extraction (squashfs_root/...), so the regular
+        icon search works unchanged.
+        
+        Returns:
+            str or None: Path of the written .desktop file, or None if unavailable
+        """
+        if SquashFsImage is None:
+            return None
+        offset = self._squashfs_image_offset()
+        if offset is None:
+            logger.debug("No squashfs image found at the ELF end, skipping in-process metadata read.")
+            return None
+
+        try:
+            with SquashFsImage.from_file(self.appimage_path, offset=offset) as image:
+                desktop_entry = _find_squashfs_desktop_entry(image)
+                if desktop_entry is None:
+                    logger.debug("No .desktop file in squashfs root directory.")
+                    return None
+
+                desktop_data = self._read_squashfs_file(image, desktop_entry.name)
+                if desktop_data is None:
+                    return None
+                os.makedirs(squashfs_root, exist_ok=True)
+                desktop_path = os.path.join(squashfs_root, desktop_entry.name)
+                with open(desktop_path, 'wb') as f:
+                    f.write(desktop_data)
+                logger.debug("Read desktop file from squashfs: %s", desktop_path)
+
+                icon_data = self._read_squashfs_file(image, ".DirIcon")
+                if icon_data is not None:
+                    with open(os.path.join(squashfs_root, ".DirIcon"), 'wb') as f:
+                        f.write(icon_data)
+                    logger.debug("Read icon from squashfs: .DirIcon")
+                else:
+                    icon_name = self._parse_desktop_file(desktop_path).get("icon_name")
+                    self._read_squashfs_icon_from_dirs(image, icon_name, squashfs_root)
+                return desktop_path
+        except Exception as e:
+            logger.warning(f"In-process squashfs metadata read failed, falling back to extraction: {e}")
+            return None
+
+    def _read_squashfs_icon_from_dirs(self, image, icon_name, squashfs_root):
+        """Looks up icon_name in the ICON_SEARCH_DIRS of a squashfs image.
+        
+        Each directory listing is scanned once, instead of probing every
+        name/extension combination; the best match (exact name first, then by
+        ICON_EXTS preference) is written to the same relative path under
+        squashfs_root, where the regular icon search picks it up.
+        
+        Returns:
+            str or None: Path of the written icon, or None if none was found
+        """
+        if not icon_name or '/' in icon_name:
+            return None
+        for icon_dir in ICON_SEARCH_DIRS:
+            try:
+                directory = image.select("/" + icon_dir) if icon_dir else image.root
+            except Exception:
+                directory = None
+            if directory is None or not directory.is_dir:
+                continue
+            exact_match = None
+            ext_matches = {}
+            for entry in directory:
+                if entry.is_dir:
+                    continue
+                if entry.name == icon_name:
+                    exact_match = entry.name
+                    continue
+                match = ICON_RE.match(entry.name)
+                if match and match.group(1) == icon_name:
+                    ext_matches.setdefault(match.group(2).lower(), entry.name)
+            icon_file = exact_match or next((ext_matches[ext] for ext in ICON_EXTS if ext in ext_matches), None)
+            if not icon_file:
+                continue
+            icon_data = self._read_squashfs_file(image, f"{icon_dir}/{icon_file}" if icon_dir else icon_file)
+            if icon_data is None:
+                continue
+            icon_path = os.path.join(squashfs_root, icon_dir, icon_file)
+            os.makedirs(os.path.dirname(icon_path), exist_ok=True)
+            with open(icon_path, 'wb') as f:
+                f.write(icon_data)
+            logger.debug("Read icon from squashfs: %s/%s", icon_dir, icon_file)
+            return icon_path
+        return None
+
+    def _parse_desktop_file_from_squashfs(self):
+        """Parses the root .desktop file straight from the embedded squashfs image.
+        
+        Nothing is spawned or written to disk. Requires the optional PySquashfsImage package.
+        
+        Returns:
+            dict or None: Parsed metadata, or None if the image can't be read this way
+        """
+        if SquashFsImage is None:
+            return None
+        offset = self._squashfs_image_offset()
+        if offset is None:
+            return None
+        try:
+            with SquashFsImage.from_file(self.appimage_path, offset=offset) as image:
+                desktop_entry = _find_squashfs_desktop_entry(image)
+                if desktop_entry is None:
+                    logger.debug("No .desktop file in squashfs root directory.")
+                    return None
+                desktop_data = self._read_squashfs_file(image, desktop_entry.name)
+            if desktop_data is None:
+                return None
+        except Exception as e:
+            logger.warning(f"In-process squashfs metadata read failed, falling back to extraction: {e}")
+            return None
+        logger.debug("Parsing desktop file %s from squashfs without extraction", desktop_entry.name)
+        return _parse_desktop_bytes(desktop_data, f"{self.appimage_path}:{desktop_entry.name}")
+
+    def _read_squashfs_file(self, image, path, max_links=8):
+        """Returns the contents of a file in a squashfs image, following symlinks."""
+        for _ in range(max_links):
+            try:
+                entry = image.select("/" + path.lstrip("/"))
+            except Exception:
+                entry = None
+            if entry is None or entry.is_dir:
+                return None
+            if not entry.is_symlink:
+                return entry.read_bytes()
+            target = entry.readlink()
+            if not target.startswith("/"):
+                target = os.path.normpath(os.path.join(os.path.dirname(path), target))
+            path = target
+        return None
+
     def _populate_fallback_metadata(self):
         """Populates self.app_info with fallback data when metadata reading fails."""
-        base_name = os.path.basename(self.appimage_path)
-        if base_name.lower().endswith('.appimage'):
-            base_name = base_name[:-len('.appimage')]
+        base_name = APPIMAGE_SUFFIX_RE.sub('', os.path.basename(self.appimage_path))
             
         # Create sanitized name first
         sanitized_name = sanitize_name(base_name)
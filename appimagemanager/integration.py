@@ -114,7 +114,8 @@ def update_desktop_database(desktop_dir):
         
     if shutil.which("update-desktop-database"):
         try:
-            subprocess.run(["update-desktop-database", desktop_dir], check=False, capture_output=True)
+            subprocess.run(["update-desktop-database", desktop_dir], check=False,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
             logger.info(f"Masaüstü veritabanı güncellendi: {desktop_dir}")
         except Exception as e:
              logger.warning(f"'update-desktop-database' çalıştırılırken hata: {e}")
@@ -137,7 +138,7 @@ def update_icon_cache(icon_base_dir=None):
         try:
             logger.info(f"Updating icon cache for directory: {icon_base_dir}")
             subprocess.run(["gtk-update-icon-cache", "-f", "-t", icon_base_dir],
-                          check=False, capture_output=True)
+                          check=False, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
             logger.info("Icon cache updated")
         except Exception as e:
             logger.warning(f"Failed to update icon cache: {e}")
@@ -208,24 +209,28 @@ def copy_app_icons(final_icon_path, app_install_dir, app_info):
 
         if hicolor_dir_install:
             logger.debug(f"Searching for additional icons in source hicolor directory: {hicolor_dir_install}")
-            for size_dir in os.listdir(hicolor_dir_install):
-                size_path = os.path.join(hicolor_dir_install, size_dir)
-                # Basic check for common size directory names (e.g., 128x128, scalable)
-                if os.path.isdir(size_path) and ("x" in size_dir or size_dir == "scalable"):
-                    apps_dir = os.path.join(size_path, "apps")
-                    if os.path.isdir(apps_dir):
-                        for icon_file in os.listdir(apps_dir):
-                            # Match icons starting with the icon_name and common extensions
-                            if icon_file.startswith(icon_name + ".") and icon_file.endswith((".png", ".svg", ".svgz")):
-                                src_icon = os.path.join(apps_dir, icon_file)
-                                # Determine target directory based on size_dir
-                                target_icon_dir = os.path.join(standard_icon_base_dir, size_dir, "apps")
-                                os.makedirs(target_icon_dir, exist_ok=True)
-                                target_icon = os.path.join(target_icon_dir, icon_file)
-                                # Copy the icon
-                                shutil.copy2(src_icon, target_icon)
-                                logger.debug(f"Copied additional icon: {src_icon} -> {target_icon}")
-                                icons_copied = True
+            with os.scandir(hicolor_dir_install) as size_entries:
+                size_dirs = [(entry.name, entry.path) for entry in size_entries
+                             # Basic check for common size directory names (e.g., 128x128, scalable)
+                             if ("x" in entry.name or entry.name == "scalable") and entry.is_dir()]
+            for size_dir, size_path in size_dirs:
+                apps_dir = os.path.join(size_path, "apps")
+                try:
+                    with os.scandir(apps_dir) as icon_entries:
+                        icon_files = [(entry.name, entry.path) for entry in icon_entries]
+                except OSError:
+                    continue # No apps/ for this size
+                for icon_file, src_icon in icon_files:
+                    # Match icons starting with the icon_name and common extensions
+                    if icon_file.startswith(icon_name + ".") and icon_file.endswith((".png", ".svg", ".svgz")):
+                        # Determine target directory based on size_dir
+                        target_icon_dir = os.path.join(standard_icon_base_dir, size_dir, "apps")
+                        os.makedirs(target_icon_dir, exist_ok=True)
+                        target_icon = os.path.join(target_icon_dir, icon_file)
+                        # Copy the icon
+                        shutil.copy2(src_icon, target_icon)
+                        logger.debug(f"Copied additional icon: {src_icon} -> {target_icon}")
+                        icons_copied = True
     except Exception as e:
         logger.error(f"Error searching for/copying additional icons: {e}")
 
@@ -24,7 +24,7 @@ import tempfile
 from .. import config
 # from i18n import _ # Remove this import
 from ..i18n import get_translator # Import the getter function
-from ..utils import sanitize_name # <-- Import from utils
+from ..utils import sanitize_name, find_first_matching, DESKTOP_RE, DESKTOP_PRUNE_DIRS # <-- Import from utils
 from ..db_manager import DBManager # ADD THIS IMPORT
 from .. import sudo_helper # ADD THIS IMPORT
 # from .. import appimage_utils # This might not be needed anymore if sanitize_name moved
@@ -374,8 +374,8 @@ class InstallPage(QWidget):
 
                 # Get the extract directory for Qt detection
                 extract_dir_for_qt = None
-                if temp_installer and hasattr(temp_installer, 'temp_dir') and temp_installer.temp_dir:
-                    potential_squashfs = os.path.join(temp_installer.temp_dir, "meta_read", "squashfs-root")
+                if temp_installer and getattr(temp_installer, 'metadata_squashfs_root', None):
+                    potential_squashfs = temp_installer.metadata_squashfs_root
                     if os.path.isdir(potential_squashfs):
                         extract_dir_for_qt = potential_squashfs
                 
@@ -591,15 +591,10 @@ exec "{final_installed_exec_path}" "$@"
                     # Try to locate desktop file in extract dir
                     extract_desktop = None
                     if hasattr(installer, 'extract_dir') and installer.extract_dir and os.path.isdir(installer.extract_dir):
-                        # Look recursively for desktop files in extract_dir
-                        for root, _, files in os.walk(installer.extract_dir):
-                            for file in files:
-                                if file.endswith(".desktop"):
-                                    extract_desktop = os.path.join(root, file)
-                                    logger.debug(f"Found desktop file: {extract_desktop}")
-                                    break
-                            if extract_desktop:
-                                break
+                        # Look recursively for desktop files in extract_dir, stopping at the first hit
+                        extract_desktop = find_first_matching(installer.extract_dir, DESKTOP_RE, prune=DESKTOP_PRUNE_DIRS)
+                        if extract_desktop:
+                            logger.debug(f"Found desktop file: {extract_desktop}")
                                 
                     if extract_desktop:
                         # Copy the desktop file to target
@@ -753,6 +748,10 @@ exec "{final_installed_exec_path}" "$@"
             self.custom_path_input.setEnabled(True)
             self.custom_path_button.setEnabled(True)
             
+            # Unmount/remove the installer's extraction right away instead of at exit
+            if installer:
+                installer.cleanup()
+            
             # Clean up temporary directories
             for temp_dir in self.temp_dirs:
                 try:
@@ -5,13 +5,25 @@ Loglama, hata işleme ve diğer yardımcı fonksiyonlar.
 
 import os
 import logging
+import functools
 from logging.handlers import RotatingFileHandler
 from . import config
 import re
 import shutil
+import urllib.parse
+from collections import deque
 
 logger = logging.getLogger(__name__)
 
+SIMPLE_NAME_RE = re.compile(r'^[a-z0-9]+$') # Names sanitize_name can return unchanged
+VERSION_SUFFIX_RE = re.compile(r'[-_ ]?v?[0-9]+(\.[0-9]+)*([-_].*)?$') # e.g. -1.2.3, _v2
+SEPARATORS_RE = re.compile(r'[\s/:]+')
+UNSAFE_CHARS_RE = re.compile(r'[^a-z0-9_\-\.]')
+UNDERSCORES_RE = re.compile(r'_+')
+DESKTOP_PRUNE_DIRS = frozenset({'icons', 'fonts', 'locale', 'man', 'doc', 'themes'}) # usr/share subdirs never holding the .desktop
+DESKTOP_RE = re.compile(r".+\.desktop\Z", re.I)
+SANITIZE_CACHE_SIZE = 1024 # Distinct names kept by sanitize_name's cache
+
 def setup_logging():
     """Uygulama için loglama yapılandırmasını ayarlar."""
     # Log dizinini oluştur
@@ -50,10 +62,12 @@ def setup_logging():
     
     return root_logger 
 
+@functools.lru_cache(maxsize=SANITIZE_CACHE_SIZE)
 def sanitize_name(name):
     """Sanitizes an application name for use in directory or file names.
     Removes special characters and replaces spaces.
     SECURITY: Prevents path traversal attacks.
+    Pure function of name, so results are cached.
     """
     if not name:
         return None
@@ -64,7 +78,6 @@ def sanitize_name(name):
         
         # SECURITY: URL decode potential encoded characters first
         # This prevents bypassing sanitization with %2F, %2E, etc.
-        import urllib.parse
         try:
             name = urllib.parse.unquote(name)
         except Exception:
@@ -77,17 +90,17 @@ def sanitize_name(name):
         name = name.replace('..', '')  # Remove directory traversal
         
         # Pre-check if the name is already clean and simple (only letters, no spaces or special chars)
-        if re.match(r'^[a-z0-9]+$', name):
+        if SIMPLE_NAME_RE.match(name):
             # Name is already clean and simple, return as is
             return name
             
         # Remove version numbers or similar patterns (e.g., -1.2.3, _v2)
-        name = re.sub(r'[-_ ]?v?[0-9]+(\.[0-9]+)*([-_].*)?$', '', name)
+        name = VERSION_SUFFIX_RE.sub('', name)
         # Replace spaces and common separators with underscore
-        name = re.sub(r'[\s/:]+', '_', name)
+        name = SEPARATORS_RE.sub('_', name)
         # Remove characters not suitable for filenames (allow letters, numbers, underscore, hyphen, dot)
         # SECURITY: Explicitly disallow / and \ even though regex should catch them
-        name = re.sub(r'[^a-z0-9_\-\.]', '', name)
+        name = UNSAFE_CHARS_RE.sub('', name)
         # Remove leading/trailing underscores/hyphens/dots
         name = name.strip('_-.')
         
@@ -102,7 +115,7 @@ def sanitize_name(name):
             return "sanitized_app"
         
         # Fix names with multiple consecutive underscores
-        name = re.sub(r'_+', '_', name)
+        name = UNDERSCORES_RE.sub('_', name)
         
         return name
     except Exception as e:
@@ -111,6 +124,67 @@ def sanitize_name(name):
         return "sanitization_error"
 
 
+# --- Directory Scanning ---
+
+def list_dir(directory, listings=None):
+    """Returns the entries of directory as (name, path, is_dir) tuples, or None if it can't be read.
+    
+    is_dir doesn't follow symlinks. If a listings dict is given, results are
+    cached in it by directory, so several searches over the same tree read
+    each directory only once.
+    """
+    if listings is not None and directory in listings:
+        return listings[directory]
+    try:
+        with os.scandir(directory) as it:
+            entries = [(entry.name, entry.path, entry.is_dir(follow_symlinks=False)) for entry in it]
+    except OSError:
+        entries = None
+    if listings is not None:
+        listings[directory] = entries
+    return entries
+
+def _scan_dir(directory):
+    """Yields the entries of directory as (name, path, is_dir) tuples while they are read.
+    
+    Unlike list_dir nothing is materialized, so a caller that stops early also
+    stops reading the directory. Yields nothing if it can't be read.
+    """
+    try:
+        with os.scandir(directory) as it:
+            for entry in it:
+                yield entry.name, entry.path, entry.is_dir(follow_symlinks=False)
+    except OSError:
+        return
+
+def find_first_matching(root, pattern, prune=None, listings=None):
+    """Returns the path of the shallowest non-directory entry under root whose name matches pattern.
+    
+    Iterative scandir-based breadth-first search: a whole level is checked before
+    the next one is read (the .desktop file usually sits at the top level, else
+    in a shallow usr/share/applications), so deep library trees are only
+    visited if nothing matched above them. The search stops at the first match.
+    Symlinked directories are not followed. If prune is given, hidden directories
+    and the directories it names inside usr/share (or share) are not descended into.
+    Directory listings are shared through listings (see list_dir); without it
+    each directory is streamed and the scan stops mid-directory on a match.
+    """
+    share_dirs = {os.path.join(root, "usr", "share"), os.path.join(root, "share")} if prune else ()
+    queue = deque([root])
+    while queue:
+        directory = queue.popleft()
+        skip = prune if directory in share_dirs else ()
+        entries = list_dir(directory, listings) if listings is not None else _scan_dir(directory)
+        for name, path, is_dir in entries or ():
+            if is_dir:
+                if prune and (name.startswith('.') or name in skip):
+                    continue
+                queue.append(path)
+            elif pattern.match(name):
+                return path
+    return None
+
+
 # --- System Checks ---
 
 def check_libfuse():
@@ -39,6 +39,9 @@ setup(
             "pyinstaller>=5.13.0",
             "pytest>=7.3.1",
         ],
+        "squashfs": [
+            "PySquashfsImage>=0.9",
+        ],
     },
     entry_points={
         "console_scripts": [